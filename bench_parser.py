@@ -0,0 +1,645 @@
+"""Бенчмарки парсера без сети и реальных публикаций
+
+RSS фикстуры (bench_fixtures/*.xml) масштабируются синтетическими записями
+до нужного размера и отдаются локальным HTTP сервером, который заодно
+изображает Telegram Bot API, OpenAI и Twitter. Для каждого замера - пропускная
+способность и перцентили задержки; результаты сравниваются с сохраненным
+эталоном (bench_baseline.json), регрессия дает exit code 1.
+
+    python bench_parser.py                   # быстрый набор
+    python bench_parser.py --full            # до 100k записей в feeds и 1M в истории
+    python bench_parser.py --save-baseline   # сохранить результаты как эталон
+    python bench_parser.py --record          # обновить фикстуры из живых RSS_SOURCES
+
+Фикстуры в репозитории синтетические: RSS 2.0 разметка, собранная из
+заголовков published_news.jsonl, а не снимки настоящих feeds. --record
+заменяет их записанными feeds.
+"""
+
+import argparse
+import contextlib
+import copy
+import http.server
+import io
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import requests
+
+import news_parser
+from news_config import IMPORTANCE_RULES, EXCLUDE_KEYWORDS, RSS_SOURCES
+from news_config import BATCH_SIMILARITY_THRESHOLD
+from news_dedup import DuplicateIndex, NormalizedTitle, tokenize_title, title_fingerprint, encode_fingerprint
+from news_history import JsonlHistory
+from news_metrics import METRICS
+from news_parser import calculate_importance, calculate_similarity, deduplicate_news, dedup_sort_key, is_duplicate
+
+FIXTURES_DIR = 'bench_fixtures'
+BASELINE_FILE = 'bench_baseline.json'
+REGRESSION_TOLERANCE = 0.25    # Медленнее эталона больше чем на 25% - регрессия
+
+MEDIA_NS = 'http://search.yahoo.com/mrss/'
+ET.register_namespace('media', MEDIA_NS)
+ET.register_namespace('dc', 'http://purl.org/dc/elements/1.1/')
+
+ALPHA_TAKE_STUB = (
+    "ALPHA_TAKE: Benchmark stub response that keeps the parser busy without calling OpenAI.\n"
+    "CONTEXT: Moderate positive\n"
+    "HASHTAGS: #Bitcoin #Bench"
+)
+
+
+def legacy_calculate_importance(news_item):
+    """calculate_importance до компиляции keywords - эталон для сравнения"""
+    title = news_item['title'].lower()
+    score = 0
+    matched_categories = []
+    
+    for exclude in EXCLUDE_KEYWORDS:
+        if exclude in title:
+            return 0, ['EXCLUDED']
+    
+    for category, rules in IMPORTANCE_RULES.items():
+        for keyword in rules['keywords']:
+            if keyword.lower() in title:
+                score += rules['weight']
+                if category not in matched_categories:
+                    matched_categories.append(category)
+                break
+    
+    if 'sec' in title and 'CRITICAL' not in matched_categories and 'HIGH' not in matched_categories:
+        score += 50
+        matched_categories.append('HIGH')
+    
+    if 'bitcoin' in title or re.search(r'\bbtc\b', title):
+        score *= 1.3
+    
+    if re.search(r'\$\s*[\d,]+\.?\d*\s*[mbk]?|\$\s*[\d,]+|\d+\.?\d*%', title, re.IGNORECASE):
+        score *= 1.2
+    
+    score *= news_item['source_weight']
+    
+    return round(score), matched_categories
+
+
+def legacy_deduplicate_news(news_list, threshold=BATCH_SIMILARITY_THRESHOLD):
+    """Попарный deduplicate_news до кластеризации - эталон для сравнения"""
+    unique_news = []
+    for item in sorted(news_list, key=dedup_sort_key):
+        if not any(calculate_similarity(item['title'], kept['title']) >= threshold for kept in unique_news):
+            unique_news.append(item)
+    return unique_news
+
+
+def make_titles(count, seed=42):
+    """Синтетические заголовки: реальные из published_news.jsonl + keywords из конфига"""
+    rng = random.Random(seed)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = [record['title'] for record in JsonlHistory('published_news.jsonl', retention_days=None).load().records]
+    
+    keywords = [kw for rules in IMPORTANCE_RULES.values() for kw in rules['keywords']]
+    fillers = ['Bitcoin', 'BTC', 'Ethereum', 'markets', 'traders', 'after', 'as', 'amid',
+               '$2.5B', '12%', 'week', 'report', 'SEC', 'investors', 'rally', 'Solana']
+    
+    titles = []
+    for _ in range(count):
+        roll = rng.random()
+        if base and roll < 0.5:
+            titles.append(rng.choice(base))
+            continue
+        
+        words = rng.sample(fillers, rng.randint(3, 7))
+        words.insert(rng.randint(0, len(words)), rng.choice(keywords))
+        if roll > 0.9:
+            words.append(rng.choice(EXCLUDE_KEYWORDS))
+        titles.append(' '.join(words).title() if roll > 0.7 else ' '.join(words))
+    
+    return titles
+
+
+def make_items(titles, seed=42):
+    """Оборачиваем заголовки в news_item как из fetch_rss_feed"""
+    rng = random.Random(seed)
+    sources = list(RSS_SOURCES.items())
+    items = []
+    for title in titles:
+        source_name, config = rng.choice(sources)
+        items.append({
+            'title': title,
+            'source': source_name,
+            'source_weight': config['weight_multiplier'],
+            'source_priority': config['priority'],
+            'norm': NormalizedTitle(title)
+        })
+    return items
+
+
+def _best_time(func, items, repeat):
+    """Лучшее время из repeat прогонов func по всем items"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _per_call(func, items):
+    """Время каждого вызова func(item), секунды"""
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, pct):
+    """Перцентиль по nearest-rank"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results, name, samples, ops=None):
+    """Пропускная способность (ops за все samples в секунду) и перцентили
+    задержки одного замера; по умолчанию одна операция на sample"""
+    total = sum(samples)
+    if ops is None:
+        ops = len(samples)
+    stats = {
+        'ops': ops,
+        'throughput': round(ops / total, 1) if total else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 4),
+        'p90_ms': round(percentile(samples, 90) * 1000, 4),
+        'p99_ms': round(percentile(samples, 99) * 1000, 4),
+        'max_ms': round(max(samples) * 1000, 4)
+    }
+    results[name] = stats
+    print(f"  {name:34} {stats['throughput']:>12,.0f} ops/s   p50 {stats['p50_ms']:9.3f} ms"
+          f"   p90 {stats['p90_ms']:9.3f} ms   p99 {stats['p99_ms']:9.3f} ms")
+    return stats
+
+
+# --- фикстуры ---
+
+def load_fixtures(path=FIXTURES_DIR):
+    """Фикстуры feeds: {source_name: bytes}"""
+    fixtures = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith('.xml'):
+            with open(os.path.join(path, name), 'rb') as f:
+                fixtures[name[:-4]] = f.read()
+    return fixtures
+
+
+def record_fixtures(path=FIXTURES_DIR):
+    """Скачиваем текущие feeds из RSS_SOURCES в фикстуры"""
+    os.makedirs(path, exist_ok=True)
+    for source_name, config in RSS_SOURCES.items():
+        try:
+            body, _ = news_parser.download_feed(config['url'])
+        except Exception as e:
+            print(f"✗ {source_name}: {e}")
+            continue
+        with open(os.path.join(path, f'{source_name}.xml'), 'wb') as f:
+            f.write(body)
+        print(f"✓ Recorded {source_name}: {len(body):,} bytes")
+
+
+def scale_feed(xml_bytes, count, base_url, seed=42):
+    """Feed из count записей: записи фикстуры + синтетические по их образцу
+    
+    Ссылки и guid уникальны, даты свежие (шаг 37 с), картинки указывают на
+    заглушку base_url.
+    """
+    root = ET.fromstring(xml_bytes)
+    channel = root.find('channel')
+    templates = channel.findall('item')
+    for item in templates:
+        channel.remove(item)
+    
+    titles = make_titles(max(0, count - len(templates)), seed)
+    newest = datetime.now(timezone.utc).replace(microsecond=0)
+    
+    for i in range(count):
+        item = copy.deepcopy(templates[i % len(templates)])
+        if i >= len(templates):
+            item.find('title').text = titles[i - len(templates)]
+        
+        link = f"{item.findtext('link')}?bench={i}"
+        item.find('link').text = link
+        if item.find('guid') is not None:
+            item.find('guid').text = link
+        if item.find('pubDate') is not None:
+            item.find('pubDate').text = format_datetime(newest - timedelta(seconds=37 * i), usegmt=True)
+        
+        image_url = f"{base_url}/img/{i % 16}.jpg"
+        for media in item.iter(f'{{{MEDIA_NS}}}content'):
+            media.set('url', image_url)
+        for enclosure in item.iter('enclosure'):
+            enclosure.set('url', image_url)
+        
+        channel.append(item)
+    
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def scale_fixtures(fixtures, total, base_url):
+    """Делим total записей поровну между фикстурами"""
+    per_feed = max(1, total // len(fixtures))
+    return {name: scale_feed(body, per_feed, base_url, seed=i) for i, (name, body) in enumerate(fixtures.items())}
+
+
+# --- заглушки ---
+
+def _make_jpeg(size=(1200, 800)):
+    from PIL import Image
+    
+    output = io.BytesIO()
+    Image.new('RGB', size, (40, 90, 160)).save(output, format='JPEG', quality=85)
+    return output.getvalue()
+
+
+class StubServer:
+    """Локальный HTTP сервер: фикстуры feeds, картинки, Telegram, OpenAI, Twitter
+    
+    latency - задержка ответа API (сек), чтобы изображать удаленный сервис.
+    """
+    
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.feeds = {}
+        self.calls = {}
+        self.image = _make_jpeg()
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+    
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, *args):
+                pass
+            
+            def _reply(self, status, body, content_type='application/json'):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def _count(self, name):
+                stub.calls[name] = stub.calls.get(name, 0) + 1
+            
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path.startswith('/feeds/'):
+                    body = stub.feeds.get(path[len('/feeds/'):-len('.xml')])
+                    if body is None:
+                        return self._reply(404, b'', 'text/plain')
+                    self._count('feed')
+                    return self._reply(200, body, 'application/rss+xml')
+                if path.startswith('/img/'):
+                    self._count('image')
+                    return self._reply(200, stub.image, 'image/jpeg')
+                self._reply(404, b'', 'text/plain')
+            
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                
+                if self.path.startswith('/bot'):
+                    self._count('telegram')
+                    return self._reply(200, {'ok': True, 'result': {'message_id': 1}})
+                if self.path.endswith('/chat/completions'):
+                    self._count('openai')
+                    return self._reply(200, {
+                        'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': 0, 'model': 'gpt-4o-mini',
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': ALPHA_TAKE_STUB}}],
+                        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+                    })
+                if self.path.startswith('/2/tweets'):
+                    self._count('twitter')
+                    return self._reply(201, {'data': {'id': '1', 'text': 'bench'}})
+                self._reply(404, b'', 'text/plain')
+        
+        return Handler
+
+
+class _RedirectAdapter(requests.adapters.HTTPAdapter):
+    """Отправляет запросы к реальному API (tweepy ходит только на api.twitter.com) в заглушку"""
+    
+    def __init__(self, prefix, target):
+        super().__init__()
+        self.prefix = prefix
+        self.target = target
+    
+    def send(self, request, **kwargs):
+        request.url = self.target + request.url[len(self.prefix):]
+        return super().send(request, **kwargs)
+
+
+@contextlib.contextmanager
+def stubbed_bot(server, fixtures):
+    """news_parser смотрит на заглушки: RSS_SOURCES, Telegram, OpenAI, Twitter"""
+    saved = {name: getattr(news_parser, name) for name in (
+        'RSS_SOURCES', 'TELEGRAM_API_BASE', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHANNEL_ID', 'TWITTER_ENABLED',
+        'TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET', '_openai_client'
+    )}
+    saved_env = {name: os.environ.get(name) for name in ('OPENAI_API_KEY', 'OPENAI_BASE_URL')}
+    
+    news_parser.RSS_SOURCES = {
+        source_name: dict(RSS_SOURCES.get(source_name, {'priority': len(RSS_SOURCES) + 1, 'weight_multiplier': 1.0}),
+                          url=f"{server.url}/feeds/{source_name}.xml")
+        for source_name in fixtures
+    }
+    news_parser.TELEGRAM_API_BASE = server.url
+    news_parser.TELEGRAM_BOT_TOKEN = 'bench'
+    news_parser.TELEGRAM_CHANNEL_ID = '@bench'
+    news_parser.TWITTER_ENABLED = True
+    for name in ('TWITTER_API_KEY', 'TWITTER_API_SECRET', 'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET'):
+        setattr(news_parser, name, 'bench')
+    news_parser._openai_client = None
+    os.environ['OPENAI_API_KEY'] = 'bench'
+    os.environ['OPENAI_BASE_URL'] = f"{server.url}/v1"
+    
+    tweepy = None
+    try:
+        import tweepy
+        original_client = tweepy.Client
+        
+        class StubClient(original_client):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.session.mount('https://api.twitter.com', _RedirectAdapter('https://api.twitter.com', server.url))
+        
+        tweepy.Client = StubClient
+    except ImportError:
+        pass
+    
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(news_parser, name, value)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if tweepy is not None:
+            tweepy.Client = original_client
+
+
+# --- замеры ---
+
+def bench_importance(results, count=10000, repeat=3):
+    """calculate_importance: скомпилированные keywords против старого перебора"""
+    print(f"\n🎯 calculate_importance on {count} titles...")
+    items = make_items(make_titles(count))
+    
+    for item in items:
+        assert calculate_importance(item) == legacy_calculate_importance(item), item['title']
+    
+    legacy = _best_time(legacy_calculate_importance, items, repeat)
+    compiled = _best_time(calculate_importance, items, repeat)
+    
+    print(f"  legacy:   {legacy * 1000:8.1f} ms ({count / legacy:,.0f} titles/s)")
+    print(f"  compiled: {compiled * 1000:8.1f} ms ({count / compiled:,.0f} titles/s)")
+    print(f"  speedup:  {legacy / compiled:.1f}x")
+    summarize(results, 'calculate_importance', _per_call(calculate_importance, items))
+    return legacy / compiled
+
+
+def bench_deduplicate(results, count=3000, repeat=5):
+    """deduplicate_news: кластеризация через индекс против попарного перебора"""
+    print(f"\n🔁 deduplicate_news on {count} items...")
+    rng = random.Random(7)
+    items = make_items(make_titles(count))
+    for item in items:
+        item['score'] = rng.randint(0, 200)
+    
+    started = time.perf_counter()
+    expected = legacy_deduplicate_news(items)
+    legacy = time.perf_counter() - started
+    
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = deduplicate_news(items)
+        samples.append(time.perf_counter() - started)
+    clustered = min(samples)
+    
+    assert result == expected
+    
+    print(f"  pairwise:  {legacy * 1000:8.1f} ms")
+    print(f"  clustered: {clustered * 1000:8.1f} ms ({len(result)} kept)")
+    print(f"  speedup:   {legacy / clustered:.1f}x")
+    summarize(results, 'deduplicate_news', samples, ops=count * len(samples))
+    return legacy / clustered
+
+
+def make_history(size, seed=11):
+    """Синтетическая история публикаций: заголовки из словаря реальных
+    заголовков, с отпечатками 'fp', как их пишет JsonlHistory"""
+    rng = random.Random(seed)
+    vocabulary = sorted({token for title in make_titles(2000, seed) for token in tokenize_title(title)})
+    history = []
+    for i in range(size):
+        title = ' '.join(rng.sample(vocabulary, rng.randint(6, 12)))
+        history.append({'title': title, 'link': f'https://bench.local/{i}',
+                        'fp': encode_fingerprint(title_fingerprint(title))})
+    return history
+
+
+def bench_is_duplicate(results, sizes, lookups=2000):
+    """is_duplicate против истории разного размера (половина запросов - повторы)"""
+    print(f"\n🔎 is_duplicate, {lookups} lookups per history size...")
+    for size in sizes:
+        history = make_history(size)
+        
+        started = time.perf_counter()
+        index = DuplicateIndex(history)
+        print(f"  history {size:>9,}: index built in {time.perf_counter() - started:.2f}s")
+        
+        rng = random.Random(size)
+        items = make_items(make_titles(lookups // 2, seed=size))
+        items += [{'title': title, 'link': '', 'norm': NormalizedTitle(title)}
+                  for title in (rng.choice(history)['title'] for _ in range(lookups - len(items)))]
+        rng.shuffle(items)
+        
+        summarize(results, f'is_duplicate[{size}]', _per_call(lambda item: is_duplicate(item, index), items))
+
+
+def bench_parse(results, fixtures, sizes):
+    """Разбор feeds: news_rss.parse_rss2 против feedparser (без cutoff, те же записи)"""
+    import feedparser
+    from news_rss import parse_rss2
+    
+    print(f"\n⚡ Feed parsing on {len(fixtures)} fixture feeds (ops = entries, latency per feed)...")
+    for total in sizes:
+        scaled = scale_fixtures(fixtures, total, 'http://bench.local')
+        for name, parse in (('feedparser', lambda body: feedparser.parse(body).entries), ('parse_rss2', parse_rss2)):
+            samples = []
+            entries = 0
+            for body in scaled.values():
+                started = time.perf_counter()
+                entries += len(parse(body))
+                samples.append(time.perf_counter() - started)
+            summarize(results, f'{name}[{total}]', samples, ops=entries)
+
+
+def bench_fetch(results, server, fixtures, sizes):
+    """fetch_rss_feed (загрузка + разбор) масштабированных фикстур с заглушки"""
+    print(f"\n📡 fetch_rss_feed on {len(fixtures)} fixture feeds (ops = entries, latency per feed)...")
+    with stubbed_bot(server, fixtures):
+        for total in sizes:
+            server.feeds = scale_fixtures(fixtures, total, server.url)
+            samples = []
+            entries = 0
+            for source_name, config in news_parser.RSS_SOURCES.items():
+                started = time.perf_counter()
+                news = news_parser.fetch_rss_feed(source_name, config)
+                samples.append(time.perf_counter() - started)
+                entries += len(news or [])
+            
+            summarize(results, f'fetch_rss_feed[{total}]', samples, ops=entries)
+
+
+def bench_main(results, server, fixtures, entries, runs):
+    """Полный main() с холодным состоянием против заглушек Telegram/OpenAI/Twitter"""
+    print(f"\n🤖 main() end-to-end, {entries} entries, {runs} runs...")
+    cwd = os.getcwd()
+    samples = []
+    
+    with stubbed_bot(server, fixtures):
+        server.feeds = scale_fixtures(fixtures, entries, server.url)
+        for _ in range(runs):
+            server.calls = {}
+            METRICS.reset()
+            with tempfile.TemporaryDirectory() as workdir:
+                os.chdir(workdir)
+                try:
+                    started = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        news_parser.main()
+                    samples.append(time.perf_counter() - started)
+                finally:
+                    os.chdir(cwd)
+    
+    summarize(results, f'main[{entries}]', samples)
+    print(f"  stub calls (last run): {server.calls}")
+    METRICS.print_summary()
+
+
+# --- эталон ---
+
+def compare_with_baseline(results, path=BASELINE_FILE, tolerance=REGRESSION_TOLERANCE):
+    """Замеры, которые хуже эталона больше чем на tolerance"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"\n⚠ No baseline at {path} - run with --save-baseline to create one")
+        return []
+    
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput']:,.0f} -> {stats['throughput']:,.0f} ops/s")
+        if stats['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {base['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms")
+    
+    print(f"\n📏 Compared with {path} (tolerance {tolerance:.0%})")
+    if regressions:
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+    else:
+        print("  ✓ No regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crypto News Bot benchmarks')
+    parser.add_argument('--full', action='store_true', help='большие размеры: 100k записей, 1M в истории')
+    parser.add_argument('--entries', type=int, nargs='+', help='сколько записей во всех feeds (по умолчанию 1000 10000)')
+    parser.add_argument('--history', type=int, nargs='+', help='размеры истории (по умолчанию 1000 10000 100000)')
+    parser.add_argument('--main-entries', type=int, default=500, help='записей в feeds для прогона main()')
+    parser.add_argument('--runs', type=int, default=3, help='прогонов main()')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='задержка ответа заглушек API, сек')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true', help='сохранить результаты как эталон')
+    parser.add_argument('--record', action='store_true', help='обновить фикстуры из живых RSS_SOURCES')
+    args = parser.parse_args()
+    
+    if args.record:
+        record_fixtures()
+        return 0
+    
+    entries = args.entries or ([10000, 100000] if args.full else [1000, 10000])
+    history = args.history or ([1000, 10000, 100000, 1000000] if args.full else [1000, 10000, 100000])
+    
+    print("=" * 70)
+    print("⏱  CRYPTO NEWS BOT - BENCHMARKS")
+    print("=" * 70)
+    
+    results = {}
+    fixtures = load_fixtures()
+    
+    bench_importance(results)
+    bench_deduplicate(results)
+    bench_is_duplicate(results, history)
+    
+    bench_parse(results, fixtures, entries)
+    
+    with StubServer(latency=args.stub_latency) as server:
+        bench_fetch(results, server, fixtures, entries)
+        bench_main(results, server, fixtures, args.main_entries, args.runs)
+    
+    regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"✓ Saved baseline to {args.baseline}")
+    
+    print("\n" + "=" * 70)
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Архив всех загруженных новостей (ARCHIVE_ENABLED) для бэктеста и replay
+
+В истории публикаций остаются только опубликованные заголовки. Архив
+сохраняет каждую разобранную новость, включая отклоненные: score, категории,
+причину отказа (reject) и признак публикации. Файлы - сжатый JSONL по дням:
+
+    archive/2026-10-17/items.jsonl.gz   новости
+    archive/2026-10-17/runs.jsonl.gz    сводка METRICS каждого запуска (тайминги этапов)
+
+Каждый flush() дописывает в файл отдельный gzip member, поэтому запись -
+только append. iter_archive читает файлы через mmap и распаковывает потоком;
+contains отбрасывает строки до json.loads.
+
+    python news_backtest.py --archive --since 2026-10-01
+"""
+
+import gzip
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from news_config import ARCHIVE_ENABLED, ARCHIVE_DIR
+
+ITEMS_FILE = 'items.jsonl.gz'
+RUNS_FILE = 'runs.jsonl.gz'
+READ_CHUNK = 1024 * 1024
+
+# Причины отказа в записях архива (reject); у опубликованных - None
+REJECT_DUPLICATE = 'duplicate'            # Уже публиковали (ссылка или похожий заголовок)
+REJECT_LOW_SCORE = 'low_score'            # Ниже MIN_IMPORTANCE_SCORE / STOCK_MARKET_THRESHOLD
+REJECT_SIMILAR = 'similar_in_batch'       # Похожая новость в этом запуске выбрана вместо нее
+REJECT_NOT_IN_TOP = 'not_in_top'          # Не вошла в top публикуемых
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class Archive:
+    """Буфер записей запуска; flush() дописывает их в партиции по дням"""
+    
+    def __init__(self, directory=ARCHIVE_DIR, enabled=ARCHIVE_ENABLED):
+        self.directory = directory
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._items = []
+        self.run = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    
+    def add(self, item, reject=None, **fields):
+        """Запоминаем новость с причиной отказа; fields - score/categories и т.п."""
+        if not self.enabled:
+            return
+        
+        published_date = item.get('published_date')
+        record = {
+            'run': self.run,
+            'fetched_at': round(time.time(), 3),
+            'source': item.get('source'),
+            'title': item.get('title'),
+            'link': item.get('link'),
+            'published_date': published_date.isoformat() if published_date else None,
+            'score': item.get('score'),
+            'categories': item.get('categories'),
+            'reject': reject,
+            'published': reject is None
+        }
+        record.update(fields)
+        
+        with self._lock:
+            self._items.append(record)
+    
+    def _append(self, filename, records):
+        """Дописываем записи одним gzip member в файлы их дней"""
+        by_day = {}
+        for record in records:
+            by_day.setdefault(_day(record['fetched_at']), []).append(record)
+        
+        for day, day_records in by_day.items():
+            partition = os.path.join(self.directory, day)
+            os.makedirs(partition, exist_ok=True)
+            data = ''.join(_dumps(record) + '\n' for record in day_records).encode('utf-8')
+            with open(os.path.join(partition, filename), 'ab') as f:
+                f.write(gzip.compress(data))
+    
+    def flush(self, metrics=None):
+        """Пишем накопленные новости и сводку запуска (METRICS.summary())"""
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            items, self._items = self._items, []
+            run = self.run
+            self.run = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        
+        try:
+            self._append(ITEMS_FILE, items)
+            if metrics is not None:
+                self._append(RUNS_FILE, [{'run': run, 'fetched_at': round(time.time(), 3),
+                                          'items': len(items), 'metrics': metrics}])
+            print(f"🗄 Archived {len(items)} news items")
+        except OSError as e:
+            print(f"⚠ Failed to write archive: {e}")
+
+
+def _iter_lines(path):
+    """Строки (bytes) многочленного gzip файла: mmap + потоковый zlib"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                tail = b''
+                for start in range(0, len(view), READ_CHUNK):
+                    data = decompressor.decompress(view[start:start + READ_CHUNK])
+                    while decompressor.eof and decompressor.unused_data:
+                        unused = decompressor.unused_data
+                        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                        data += decompressor.decompress(unused)
+                    
+                    lines = (tail + data).split(b'\n')
+                    tail = lines.pop()
+                    yield from lines
+                if tail:
+                    yield tail
+            finally:
+                view.release()
+
+
+def archive_days(directory=ARCHIVE_DIR, since=None, until=None):
+    """Дни (YYYY-MM-DD) с партициями в [since, until]"""
+    if not os.path.isdir(directory):
+        return []
+    since = str(since) if since else None
+    until = str(until) if until else None
+    return [
+        day for day in sorted(os.listdir(directory))
+        if os.path.isdir(os.path.join(directory, day))
+        and (since is None or day >= since) and (until is None or day <= until)
+    ]
+
+
+def iter_archive(directory=ARCHIVE_DIR, since=None, until=None, contains=None, filename=ITEMS_FILE):
+    """Записи архива за дни [since, until] (date или 'YYYY-MM-DD')
+    
+    contains - подстрока (str/bytes) сырой JSON строки: остальные строки не
+    разбираются, например contains='"published":true'. Недописанная строка в
+    конце файла (обрыв записи) пропускается.
+    """
+    if isinstance(contains, str):
+        contains = contains.encode('utf-8')
+    
+    for day in archive_days(directory, since, until):
+        path = os.path.join(directory, day, filename)
+        if not os.path.exists(path):
+            continue
+        try:
+            for line in _iter_lines(path):
+                if not line or (contains is not None and contains not in line):
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except zlib.error as e:
+            print(f"⚠ {path}: {e}, rest of file skipped")
+
+
+ARCHIVE = Archive()
+
+archive = ARCHIVE.add
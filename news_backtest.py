@@ -0,0 +1,304 @@
+"""Бэктест правил важности на архиве заголовков
+
+    python news_backtest.py items.jsonl [more.jsonl.gz ...] [--weight HIGH=70] [--thresholds 40,60,80]
+    python news_backtest.py --archive [--since 2026-10-01] [--until 2026-10-31]
+
+calculate_importance скорит одну новость за вызов - для подбора весов
+IMPORTANCE_RULES и MIN_IMPORTANCE_SCORE на месяцах архива это слишком долго.
+Здесь keywords сопоставляются с заголовками один раз (TitleMatrix: разреженная
+матрица заголовок x keyword), а веса категорий, бусты bitcoin/BTC и сумм/процентов
+и множители источников применяются операциями над массивами NumPy.
+score_batch дает ровно те же score, что calculate_importance. Без numpy тот же
+расчет идет на чистом Python.
+
+Записи - JSON строки с 'title' и 'source' или архив news_archive
+(ARCHIVE_ENABLED); опубликована ли новость, берется из поля 'published' или
+по истории публикаций (--published).
+"""
+
+import gzip
+import json
+import time
+
+import news_parser as bot
+from news_archive import iter_archive
+from news_config import IMPORTANCE_RULES, RSS_SOURCES, MIN_IMPORTANCE_SCORE, STOCK_MARKET_THRESHOLD, ARCHIVE_DIR
+from news_dedup import MONEY_PATTERN
+from news_history import JsonlHistory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CATEGORIES = list(IMPORTANCE_RULES)
+EXCLUDED = len(CATEGORIES)  # Колонка EXCLUDE_KEYWORDS в матрице категорий
+KEYWORDS = sorted(bot.KEYWORD_TAGS)
+KEYWORD_IDS = {keyword: i for i, keyword in enumerate(KEYWORDS)}
+KEYWORD_CATEGORIES = [
+    sorted(CATEGORIES.index(tag) if tag != 'EXCLUDED' else EXCLUDED for tag in bot.KEYWORD_TAGS[keyword])
+    for keyword in KEYWORDS
+]
+
+# Буст 'sec' в calculate_importance - только если не сработали эти категории
+SEC_BOOST = 50
+SEC_BOOST_SKIP = [CATEGORIES.index(category) for category in ('CRITICAL', 'HIGH') if category in CATEGORIES]
+
+
+class TitleMatrix:
+    """Совпадения keywords для партии заголовков (сопоставляются один раз)
+    
+    rows / keyword_ids - разреженная матрица заголовок x keyword (COO),
+    hits - заголовок x категория, последняя колонка - EXCLUDED. sec / bitcoin /
+    money - условия бустов calculate_importance. От весов ничего не зависит:
+    одну матрицу можно скорить с разными weights.
+    """
+    
+    def __init__(self, titles):
+        rows = []
+        keyword_ids = []
+        sec = []
+        bitcoin = []
+        money = []
+        
+        for row, title in enumerate(titles):
+            title = title.lower()
+            for keyword in set(bot.matched_keywords(title)):
+                rows.append(row)
+                keyword_ids.append(KEYWORD_IDS[keyword])
+            sec.append('sec' in title)
+            bitcoin.append('bitcoin' in title or bot.BTC_PATTERN.search(title) is not None)
+            money.append(MONEY_PATTERN.search(title) is not None)
+        
+        self.size = len(sec)
+        
+        if np is not None:
+            self.rows = np.array(rows, dtype=np.int64)
+            self.keyword_ids = np.array(keyword_ids, dtype=np.int64)
+            keyword_categories = np.zeros((len(KEYWORDS), EXCLUDED + 1), dtype=np.int64)
+            for keyword_id, columns in enumerate(KEYWORD_CATEGORIES):
+                keyword_categories[keyword_id, columns] = 1
+            counts = np.zeros((self.size, EXCLUDED + 1), dtype=np.int64)
+            np.add.at(counts, self.rows, keyword_categories[self.keyword_ids])
+            self.hits = counts > 0
+            self.sec = np.array(sec, dtype=bool)
+            self.bitcoin = np.array(bitcoin, dtype=bool)
+            self.money = np.array(money, dtype=bool)
+        else:
+            self.rows = rows
+            self.keyword_ids = keyword_ids
+            self.hits = [set() for _ in range(self.size)]
+            for row, keyword_id in zip(rows, keyword_ids):
+                self.hits[row].update(KEYWORD_CATEGORIES[keyword_id])
+            self.sec = sec
+            self.bitcoin = bitcoin
+            self.money = money
+    
+    def __len__(self):
+        return self.size
+    
+    def categories(self, row):
+        """Категории заголовка - как второй результат calculate_importance"""
+        hits = self.hits[row]
+        columns = [column for column in range(EXCLUDED + 1) if hits[column]] if np is not None else sorted(hits)
+        if EXCLUDED in columns:
+            return ['EXCLUDED']
+        
+        categories = [CATEGORIES[column] for column in columns]
+        if self.sec[row] and not any(column in columns for column in SEC_BOOST_SKIP):
+            categories.append('HIGH')
+        return categories
+
+
+def source_weights(sources):
+    """Имена источников -> weight_multiplier из RSS_SOURCES (числа - как есть)"""
+    return [
+        source if isinstance(source, (int, float)) else RSS_SOURCES.get(source, {}).get('weight_multiplier', 1.0)
+        for source in sources
+    ]
+
+
+def rule_weights(weights=None):
+    """Веса категорий в порядке CATEGORIES: IMPORTANCE_RULES, поверх - weights"""
+    weights = weights or {}
+    unknown = set(weights) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+    return [weights.get(category, IMPORTANCE_RULES[category]['weight']) for category in CATEGORIES]
+
+
+def score_batch(titles, sources, weights=None, matrix=None):
+    """Score каждого заголовка - как calculate_importance для одной новости
+    
+    sources - имена источников или их множители, weights - {категория: вес}
+    поверх IMPORTANCE_RULES, matrix - готовая TitleMatrix тех же titles.
+    Возвращает массив int64 (список без numpy).
+    """
+    if matrix is None:
+        matrix = TitleMatrix(titles)
+    multipliers = source_weights(sources)
+    if len(multipliers) != len(matrix):
+        raise ValueError(f"{len(matrix)} titles, {len(multipliers)} sources")
+    category_weights = rule_weights(weights)
+    
+    if np is None:
+        return [_score_row(matrix, row, category_weights, multipliers[row]) for row in range(len(matrix))]
+    
+    hits = matrix.hits[:, :EXCLUDED]
+    score = hits @ np.array(category_weights)
+    sec_boost = matrix.sec & ~hits[:, SEC_BOOST_SKIP].any(axis=1)
+    score = (score + SEC_BOOST * sec_boost).astype(np.float64)
+    
+    # Тот же порядок умножений, что в calculate_importance: float результаты совпадают
+    score = np.where(matrix.bitcoin, score * 1.3, score)
+    score = np.where(matrix.money, score * 1.2, score)
+    score = score * np.array(multipliers, dtype=np.float64)
+    
+    return np.where(matrix.hits[:, EXCLUDED], 0, np.rint(score)).astype(np.int64)
+
+
+def _score_row(matrix, row, category_weights, multiplier):
+    hits = matrix.hits[row]
+    if EXCLUDED in hits:
+        return 0
+    
+    score = 0
+    for column in sorted(hits):
+        score += category_weights[column]
+    if matrix.sec[row] and not any(column in hits for column in SEC_BOOST_SKIP):
+        score += SEC_BOOST
+    if matrix.bitcoin[row]:
+        score *= 1.3
+    if matrix.money[row]:
+        score *= 1.2
+    score *= multiplier
+    return round(score)
+
+
+# --- CLI ---
+
+def load_items(paths):
+    """Записи архива из JSONL файлов (.gz - сжатые)"""
+    items = []
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get('title'):
+                    items.append(record)
+    return items
+
+
+def published_labels(items, published_path):
+    """Была ли новость опубликована: поле 'published' или ссылка/заголовок в истории"""
+    links = set()
+    titles = set()
+    if published_path:
+        for record in JsonlHistory(published_path, retention_days=None).load().records:
+            links.add(record.get('link'))
+            titles.add(record['title'].lower())
+    
+    return [
+        bool(item['published']) if 'published' in item
+        else item.get('link') in links or item['title'].lower() in titles
+        for item in items
+    ]
+
+
+def threshold_table(scores, labels, thresholds):
+    """[(threshold, passed, published_passed, precision, recall)]"""
+    total_published = sum(labels)
+    rows = []
+    for threshold in thresholds:
+        if np is not None:
+            passed_mask = np.asarray(scores) >= threshold
+            passed = int(passed_mask.sum())
+            hits = int((passed_mask & np.asarray(labels, dtype=bool)).sum())
+        else:
+            passed = sum(1 for score in scores if score >= threshold)
+            hits = sum(1 for score, label in zip(scores, labels) if label and score >= threshold)
+        precision = hits / passed if passed else 0.0
+        recall = hits / total_published if total_published else 0.0
+        rows.append((threshold, passed, hits, precision, recall))
+    return rows
+
+
+def print_table(rows):
+    print(f"  {'threshold':>9} {'passed':>8} {'published':>9} {'precision':>9} {'recall':>7}")
+    for threshold, passed, hits, precision, recall in rows:
+        print(f"  {threshold:>9} {passed:>8} {hits:>9} {precision:>9.1%} {recall:>7.1%}")
+
+
+def replay(items, labels, weights=None, thresholds=None):
+    """Скорим архив и печатаем таблицы порогов"""
+    started = time.perf_counter()
+    matrix = TitleMatrix([item['title'] for item in items])
+    matched = time.perf_counter()
+    sources = [item.get('source', '') for item in items]
+    scores = score_batch(None, sources, weights, matrix)
+    scored = time.perf_counter()
+    
+    print(f"📚 {len(items)} items, {sum(labels)} published "
+          f"(match {matched - started:.2f}s, score {(scored - matched) * 1000:.1f} ms, "
+          f"{'numpy' if np is not None else 'pure Python'})")
+    
+    if thresholds is None:
+        thresholds = sorted(set(range(0, 301, 20)) | {MIN_IMPORTANCE_SCORE, STOCK_MARKET_THRESHOLD})
+    
+    stock = [source in bot.STOCK_SOURCES for source in sources]
+    for title, selected in (('All sources', None), ('Crypto sources', False), ('Stock sources', True)):
+        rows = [i for i, is_stock in enumerate(stock) if selected is None or is_stock == selected]
+        if not rows:
+            continue
+        print(f"\n{title} ({len(rows)} items):")
+        print_table(threshold_table([scores[i] for i in rows], [labels[i] for i in rows], thresholds))
+    
+    current = [
+        scores[i] >= (STOCK_MARKET_THRESHOLD if stock[i] else MIN_IMPORTANCE_SCORE)
+        for i in range(len(items))
+    ]
+    passed = sum(current)
+    hits = sum(1 for is_passed, label in zip(current, labels) if is_passed and label)
+    print(f"\nCurrent thresholds (MIN_IMPORTANCE_SCORE={MIN_IMPORTANCE_SCORE}, "
+          f"STOCK_MARKET_THRESHOLD={STOCK_MARKET_THRESHOLD}): {passed} passed, {hits} published, "
+          f"precision {hits / passed if passed else 0.0:.1%}, recall {hits / sum(labels) if sum(labels) else 0.0:.1%}")
+    return scores
+
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Бэктест IMPORTANCE_RULES на архиве заголовков')
+    parser.add_argument('paths', nargs='*', help='JSONL файлы с заголовками (можно .gz)')
+    parser.add_argument('--archive', nargs='?', const=ARCHIVE_DIR, metavar='DIR',
+                        help=f'читать архив news_archive (по умолчанию {ARCHIVE_DIR})')
+    parser.add_argument('--since', help='первый день архива, YYYY-MM-DD')
+    parser.add_argument('--until', help='последний день архива, YYYY-MM-DD')
+    parser.add_argument('--published', default=bot.PUBLISHED_FILE,
+                        help='история публикаций для разметки (JSONL)')
+    parser.add_argument('--weight', action='append', default=[], metavar='CATEGORY=WEIGHT',
+                        help='вес категории вместо IMPORTANCE_RULES (можно несколько)')
+    parser.add_argument('--thresholds', help='пороги через запятую')
+    args = parser.parse_args(argv)
+    
+    weights = {}
+    for override in args.weight:
+        category, _, value = override.partition('=')
+        weights[category] = float(value) if '.' in value else int(value)
+    thresholds = [int(value) for value in args.thresholds.split(',')] if args.thresholds else None
+    
+    if not args.paths and not args.archive:
+        parser.error('нужны файлы или --archive')
+    
+    items = load_items(args.paths)
+    if args.archive:
+        items += [record for record in iter_archive(args.archive, args.since, args.until) if record.get('title')]
+    replay(items, published_labels(items, args.published), weights, thresholds)
+
+
+if __name__ == '__main__':
+    main()
@@ -126,6 +126,10 @@ SOURCE_PRIORITY = {
     'decrypt': 6
 }
 
+# Telegram digest: несколько новостей с картинками одним альбомом (sendMediaGroup)
+# вместо отдельного поста на каждую. Новости без картинок уходят по одной.
+TELEGRAM_DIGEST_MODE = False
+
 # Twitter Integration
 TWITTER_ENABLED = True  # Set to False to disable Twitter posts
 
@@ -134,31 +138,113 @@ RSS_SOURCES = {
     'coindesk': {
         'url': 'https://www.coindesk.com/arc/outboundfeeds/rss/',
         'priority': 1,
-        'weight_multiplier': 1.2  # Доверяем больше
+        'weight_multiplier': 1.2,  # Доверяем больше
+        'min_interval': 120,  # Адаптивный опрос (daemon): не чаще раза в 2 мин
+        'max_interval': 900   # и не реже раза в 15 мин
     },
     'theblock': {
         'url': 'https://www.theblock.co/rss.xml',
         'priority': 1,
-        'weight_multiplier': 1.2
+        'weight_multiplier': 1.2,
+        'min_interval': 180,
+        'max_interval': 1200
     },
     'decrypt': {
         'url': 'https://decrypt.co/feed',
         'priority': 1,
-        'weight_multiplier': 1.0
+        'weight_multiplier': 1.0,
+        'min_interval': 180,
+        'max_interval': 1800
     },
     'marketwatch': {
         'url': 'https://www.marketwatch.com/rss/topstories',
         'priority': 2,
-        'weight_multiplier': 1.3  # Major US market news
+        'weight_multiplier': 1.3,  # Major US market news
+        'min_interval': 300,
+        'max_interval': 1800
     },
     'yahoo_finance': {
         'url': 'https://finance.yahoo.com/news/rssindex',
         'priority': 2,
-        'weight_multiplier': 1.3  # Stock + Crypto markets
+        'weight_multiplier': 1.3,  # Stock + Crypto markets
+        'min_interval': 300,
+        'max_interval': 1800
     },
     'reuters': {
         'url': 'https://www.reutersagency.com/feed/?taxonomy=best-topics&post_type=best',
         'priority': 2,
-        'weight_multiplier': 1.2  # Breaking business news
+        'weight_multiplier': 1.2,  # Breaking business news
+        'min_interval': 600,
+        'max_interval': 3600
     }
 }
+
+# Параллельная загрузка RSS
+FETCH_MAX_WORKERS = 6          # Сколько источников качаем одновременно
+FETCH_CONNECT_TIMEOUT = 5      # Секунд на соединение с источником
+FETCH_READ_TIMEOUT = 15        # Секунд на ответ источника
+FETCH_TOTAL_TIMEOUT = 30       # Общий дедлайн на весь этап загрузки
+# 'fast_parser': True в RSS_SOURCES - разбор обычного RSS 2.0 без feedparser
+# (news_rss.py). Включать только после сверки с feedparser на настоящем feed
+# источника (python bench_parser.py --record, затем test_parser.py).
+
+# Индекс уже обработанных записей RSS (по GUID/ссылке)
+# Записи, отклоненные или опубликованные раньше, не обрабатываются повторно
+SEEN_ENTRIES_TTL_HOURS = 48
+
+# Alpha Take (OpenAI)
+ALPHA_TAKE_MAX_WORKERS = 5     # Сколько запросов к OpenAI одновременно
+ALPHA_CACHE_TTL_HOURS = 72     # Сколько живет закэшированный ответ
+ALPHA_CACHE_MAX_ENTRIES = 500  # Максимум ответов в кэше (старые вытесняются)
+
+# HTTP (общая сессия для Telegram, картинок и RSS)
+HTTP_CONNECT_TIMEOUT = 5       # Секунд на соединение
+HTTP_READ_TIMEOUT = 20         # Секунд на ответ
+HTTP_MAX_RETRIES = 3           # Повторы при сетевых ошибках, 5xx и 429
+HTTP_BACKOFF_BASE = 1.0        # База экспоненциальной паузы между повторами (сек)
+HTTP_BACKOFF_MAX = 10.0        # Максимальная пауза между повторами (сек)
+HTTP_MAX_RETRY_AFTER = 30      # Дольше этого 429 retry_after не ждем
+HTTP_POOL_SIZE = 10            # Соединений на хост в пуле
+
+# Картинки
+WATERMARK_CROP_PIXELS = {'coindesk': 70}   # Сколько пикселей снизу срезаем (watermark)
+IMAGE_MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024  # Больше не качаем - отдаем Telegram URL
+IMAGE_MAX_DIMENSION = 1280     # Telegram все равно ужимает фото до этого размера
+IMAGE_CACHE_DIR = '.image_cache'
+IMAGE_CACHE_MAX_FILES = 200    # LRU: самые давно использованные файлы удаляются
+
+# История опубликованных новостей
+HISTORY_RETENTION_DAYS = 7     # Сколько дней помним опубликованное (для дедупликации)
+HISTORY_COMPACT_RATIO = 0.2    # Доля просроченных строк, при которой файл переписывается
+HISTORY_BACKEND = 'jsonl'      # 'jsonl' или 'sqlite' (для длинной истории, 90+ дней)
+# Быстрый парсер не разбирает записи старше окна истории (feed идет от новых
+# к старым, разбор останавливается на первой старой записи)
+FAST_PARSER_MAX_AGE_HOURS = HISTORY_RETENTION_DAYS * 24
+
+# Daemon режим (python news_parser.py --daemon)
+# Интервал опроса можно задать для источника ключом 'poll_interval' в RSS_SOURCES
+DAEMON_POLL_INTERVAL = 300     # Секунд между опросами источника по умолчанию
+DAEMON_PERSIST_INTERVAL = 300  # Как часто сохраняем состояние на диск
+
+# Адаптивный опрос в daemon режиме: интервал подстраивается под частоту
+# публикаций источника (по датам записей и 304) в пределах min/max_interval
+ADAPTIVE_MIN_INTERVAL = 120    # Границы по умолчанию, если у источника не заданы
+ADAPTIVE_MAX_INTERVAL = 1800
+ADAPTIVE_NEW_PER_POLL = 1.0    # Сколько новых записей в среднем ждем за опрос
+ADAPTIVE_SMOOTHING = 0.3       # Вес нового наблюдения в скользящем среднем
+
+# Асинхронный конвейер (python news_parser.py --pipeline)
+PIPELINE_QUEUE_SIZE = 100      # Емкость очередей между этапами (backpressure)
+PIPELINE_FAST_PUBLISH_SCORE = 150  # С таким score публикуем, не дожидаясь остальных источников
+PIPELINE_SPECULATIVE_ALPHA_TAKES = 3  # Сколько Alpha Take можно запросить до конца скоринга
+
+# Потоковый режим (python news_parser.py --stream)
+STREAM_QUEUE_SIZE = 200        # Сколько разобранных записей может ждать скоринга
+
+# Архив всех загруженных новостей с score и причиной отказа (news_archive.py)
+ARCHIVE_ENABLED = False        # Писать архив для бэктеста (news_backtest.py --archive)
+ARCHIVE_DIR = 'archive'        # Партиции по дням: archive/YYYY-MM-DD/items.jsonl.gz
+
+# Метрики этапов (news_metrics.py)
+METRICS_FILE = 'metrics.json'  # JSON сводка запуска; None - не писать
+PROMETHEUS_TEXTFILE = None     # Например '/var/lib/node_exporter/textfile/crypto_news_bot.prom'
@@ -0,0 +1,191 @@
+"""Daemon режим: python news_parser.py --daemon
+
+Один процесс вместо холодного старта по cron: HTTP сессия, OpenAI клиент,
+история с индексом дубликатов и кэши живут в памяти. Каждый источник
+опрашивается по своему интервалу (AdaptiveSchedule подстраивает его под
+частоту публикаций), состояние периодически сохраняется на диск. SIGTERM/SIGINT завершают текущий цикл, сохраняют состояние и выходят.
+"""
+
+import calendar
+import os
+import signal
+import threading
+import time
+
+import news_parser as bot
+from news_metrics import METRICS, write_metrics
+from news_archive import ARCHIVE
+from news_config import (
+    RSS_SOURCES,
+    DAEMON_POLL_INTERVAL,
+    DAEMON_PERSIST_INTERVAL,
+    ADAPTIVE_MIN_INTERVAL,
+    ADAPTIVE_MAX_INTERVAL,
+    ADAPTIVE_NEW_PER_POLL,
+    ADAPTIVE_SMOOTHING
+)
+
+SCHEDULE_FILE = os.path.join(os.path.dirname(bot.PUBLISHED_FILE), 'poll_schedule.json')
+
+
+def _utc_timestamp(published_date):
+    """datetime записи RSS (naive UTC) -> unix time"""
+    return calendar.timegm(published_date.timetuple())
+
+
+class AdaptiveSchedule:
+    """Интервал опроса источника по его реальной частоте публикаций
+    
+    Для каждого источника хранится скользящее среднее новых записей в час:
+    записи с датой публикации позже прошлого опроса, 304/без изменений - ноль
+    новых. Первый опрос оценивает частоту по разбросу дат записей в feed.
+    Интервал = ADAPTIVE_NEW_PER_POLL / частота, в пределах
+    min_interval / max_interval источника.
+    """
+    
+    def __init__(self, sources, state=None):
+        self.sources = sources
+        self.state = state if state is not None else {}
+    
+    def bounds(self, source_name):
+        config = self.sources[source_name]
+        return (config.get('min_interval', ADAPTIVE_MIN_INTERVAL),
+                config.get('max_interval', ADAPTIVE_MAX_INTERVAL))
+    
+    def observe(self, source_name, status, news, now=None):
+        """Учитываем результат опроса (status из отчета fetch_all_news)"""
+        if status not in ('ok', 'not_modified'):
+            return
+        
+        now = time.time() if now is None else now
+        stats = self.state.setdefault(source_name, {})
+        last_poll = stats.get('last_poll')
+        timestamps = sorted(_utc_timestamp(item['published_date']) for item in news or [])
+        
+        if last_poll is None:
+            if len(timestamps) >= 2 and timestamps[-1] > timestamps[0]:
+                stats['rate'] = (len(timestamps) - 1) * 3600 / (timestamps[-1] - timestamps[0])
+        else:
+            elapsed_hours = max(now - last_poll, 1.0) / 3600
+            observed = sum(1 for ts in timestamps if ts > last_poll) / elapsed_hours
+            if 'rate' in stats:
+                stats['rate'] = (1 - ADAPTIVE_SMOOTHING) * stats['rate'] + ADAPTIVE_SMOOTHING * observed
+            else:
+                stats['rate'] = observed
+        
+        stats['last_poll'] = now
+    
+    def interval(self, source_name):
+        """Секунд до следующего опроса"""
+        low, high = self.bounds(source_name)
+        rate = self.state.get(source_name, {}).get('rate')
+        
+        if rate is None:
+            seconds = DAEMON_POLL_INTERVAL
+        elif rate <= 0:
+            seconds = high
+        else:
+            seconds = ADAPTIVE_NEW_PER_POLL * 3600 / rate
+        
+        return max(low, min(high, seconds))
+
+
+class NewsDaemon:
+    """Планировщик опроса источников с теплым состоянием в памяти"""
+    
+    def __init__(self, sources=None):
+        self.sources = sources if sources is not None else RSS_SOURCES
+        self.stop_event = threading.Event()
+        
+        self.feed_cache = bot.load_feed_cache()
+        self.seen = bot.load_seen_entries()
+        self.published = bot.load_published_history()
+        self.alpha_cache = bot.AlphaTakeCache()
+        
+        self.schedule = AdaptiveSchedule(self.sources, bot.load_json_state(SCHEDULE_FILE, {}))
+        
+        self.next_poll = {source_name: 0.0 for source_name in self.sources}
+        self.last_persist = time.monotonic()
+    
+    def poll_interval(self, source_name):
+        """Интервал опроса источника (сек): фиксированный 'poll_interval' из
+        RSS_SOURCES или адаптивный по частоте публикаций"""
+        fixed = self.sources[source_name].get('poll_interval')
+        if fixed:
+            return fixed
+        return self.schedule.interval(source_name)
+    
+    def due_sources(self, now):
+        return [source_name for source_name, due in self.next_poll.items() if due <= now]
+    
+    def run_cycle(self, source_names):
+        """Опрашиваем источники, которым пора, и публикуем найденное"""
+        sources = {source_name: self.sources[source_name] for source_name in source_names}
+        report = {}
+        all_news = bot.fetch_all_news(sources, feed_cache=self.feed_cache, seen=self.seen, report=report)
+        
+        for source_name in source_names:
+            source_news = [item for item in all_news if item['source'] == source_name]
+            self.schedule.observe(source_name, report.get(source_name, {}).get('status'), source_news)
+        
+        self.published.expire()
+        bot.process_news(all_news, self.published, self.seen, self.alpha_cache)
+        self.published.save()
+        
+        now = time.monotonic()
+        for source_name in source_names:
+            interval = self.poll_interval(source_name)
+            self.next_poll[source_name] = now + interval
+            print(f"  ⏱ {source_name}: next poll in {interval / 60:.1f} min")
+    
+    def persist(self):
+        """Сохраняем кэши и индекс обработанных записей на диск"""
+        bot.prune_seen_entries(self.seen)
+        bot.save_feed_cache(self.feed_cache)
+        bot.save_seen_entries(self.seen)
+        self.alpha_cache.save()
+        bot.save_json_state(SCHEDULE_FILE, self.schedule.state)
+        write_metrics()
+        ARCHIVE.flush(METRICS.summary())
+        self.last_persist = time.monotonic()
+    
+    def stop(self, signum=None, frame=None):
+        if not self.stop_event.is_set():
+            print(f"\n🛑 Received signal {signum}, shutting down after current cycle...")
+        self.stop_event.set()
+    
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        print("=" * 60)
+        print(f"🤖 Crypto News Bot - Daemon mode ({len(self.sources)} sources)")
+        print("=" * 60)
+        
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                due = self.due_sources(now)
+                
+                if due:
+                    print(f"\n⏰ {time.strftime('%Y-%m-%d %H:%M:%S')} polling: {', '.join(due)}")
+                    try:
+                        self.run_cycle(due)
+                    except Exception as e:
+                        print(f"✗ Cycle failed: {e}")
+                        for source_name in due:
+                            self.next_poll[source_name] = time.monotonic() + self.poll_interval(source_name)
+                
+                if time.monotonic() - self.last_persist >= DAEMON_PERSIST_INTERVAL:
+                    self.persist()
+                
+                wake_at = min(min(self.next_poll.values()), self.last_persist + DAEMON_PERSIST_INTERVAL)
+                self.stop_event.wait(max(0.0, wake_at - time.monotonic()))
+        finally:
+            self.persist()
+            self.published.close()
+            print("✓ Daemon stopped, state saved")
+
+
+def run_daemon(sources=None):
+    NewsDaemon(sources).run()
@@ -0,0 +1,240 @@
+"""Нормализация заголовков и индексы для быстрой проверки дубликатов
+
+Заголовок новости нормализуется один раз при загрузке (NormalizedTitle в
+item['norm']), дальше скоринг, проверка истории, кластеризация и кэш Alpha
+Take берут оттуда lowercase, токены и отпечаток.
+"""
+
+import base64
+import functools
+import hashlib
+import re
+import sys
+from array import array
+
+_PUNCT_RE = re.compile(r'[^\w\s]')
+MONEY_PATTERN = re.compile(r'\$\s*[\d,]+\.?\d*\s*[mbk]?|\$\s*[\d,]+|\d+\.?\d*%', re.IGNORECASE)
+
+
+def tokenize_title(text):
+    """Токены заголовка для Jaccard similarity"""
+    return set(_PUNCT_RE.sub('', text.lower()).split())
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def token_hash(token):
+    """64-битный хэш токена (blake2b) - коллизии на словаре заголовков исключены
+    
+    Словарь заголовков небольшой и повторяется - хэши кэшируются.
+    """
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def title_fingerprint(title):
+    """Отпечаток заголовка: отсортированные хэши его токенов
+    
+    Jaccard по отпечаткам совпадает с Jaccard по токенам.
+    """
+    return array('Q', sorted(token_hash(token) for token in tokenize_title(title)))
+
+
+def fingerprint_to_bytes(fingerprint):
+    """Отпечаток -> uint64 little-endian байты (BLOB в SQLite)"""
+    if sys.byteorder == 'big':
+        fingerprint = array('Q', fingerprint)
+        fingerprint.byteswap()
+    return fingerprint.tobytes()
+
+
+def fingerprint_from_bytes(data):
+    fingerprint = array('Q')
+    fingerprint.frombytes(data)
+    if sys.byteorder == 'big':
+        fingerprint.byteswap()
+    return fingerprint
+
+
+def encode_fingerprint(fingerprint):
+    """Отпечаток -> base64 строка для записи в JSONL историю ('fp')"""
+    return base64.b64encode(fingerprint_to_bytes(fingerprint)).decode('ascii')
+
+
+def decode_fingerprint(text):
+    """base64 строка из истории -> отпечаток"""
+    return fingerprint_from_bytes(base64.b64decode(text))
+
+
+class NormalizedTitle:
+    """Заголовок, нормализованный один раз на новость (item['norm'])
+    
+    lower - для keywords, tokens - токены для Jaccard, fingerprint - их
+    64-битные хэши (id токенов в индексах истории), figures - суммы и проценты
+    из заголовка. Живет только в памяти: в историю и архив не пишется.
+    """
+    
+    __slots__ = ('title', 'lower', 'tokens', 'fingerprint', 'figures')
+    
+    def __init__(self, title):
+        self.title = title
+        self.lower = title.lower()
+        self.tokens = frozenset(_PUNCT_RE.sub('', self.lower).split())
+        self.fingerprint = array('Q', sorted(token_hash(token) for token in self.tokens))
+        self.figures = tuple(MONEY_PATTERN.findall(self.lower))
+    
+    def __repr__(self):
+        return f"NormalizedTitle({self.title!r})"
+
+
+def normalized_title(news_item):
+    """NormalizedTitle новости: созданный при загрузке или новый для item без 'norm'"""
+    title = news_item.get('title', '')
+    norm = news_item.get('norm')
+    if norm is None or norm.title != title:
+        norm = NormalizedTitle(title)
+    return norm
+
+
+def record_fingerprint(record):
+    """Отпечаток записи истории: готовый 'fp' или посчитанный по заголовку"""
+    encoded = record.get('fp')
+    if encoded:
+        try:
+            return decode_fingerprint(encoded)
+        except ValueError:
+            pass
+    return title_fingerprint(record.get('title', ''))
+
+
+def jaccard(tokens1, tokens2):
+    """Jaccard similarity двух множеств токенов"""
+    if not tokens1 or not tokens2:
+        return 0.0
+    
+    intersection = len(tokens1 & tokens2)
+    union = len(tokens1) + len(tokens2) - intersection
+    
+    return intersection / union if union > 0 else 0.0
+
+
+class DuplicateIndex:
+    """Индекс опубликованных новостей
+    
+    Ссылки лежат в hash set, заголовки попадают в инвертированный индекс
+    хэш токена -> [id] по отпечатку записи ('fp' из истории читается как
+    есть, без токенизации). Кандидат сравнивается только с заголовками, у
+    которых есть общие токены - для Jaccard >= порога (порог > 0) остальные
+    заведомо не подходят, результат совпадает с полным перебором через
+    calculate_similarity.
+    """
+    
+    def __init__(self, items=(), threshold=0.5):
+        self.threshold = threshold
+        self._links = set()
+        self._titles = []
+        self._token_counts = []
+        self._postings = {}
+        
+        for item in items:
+            self.add(item)
+    
+    def __len__(self):
+        return len(self._titles)
+    
+    def add(self, item):
+        """Добавляем запись ({'title', 'link', ...}) в индекс"""
+        link = item.get('link', '')
+        if link:
+            self._links.add(link)
+        
+        title = item.get('title', '')
+        if not title:
+            return
+        
+        fingerprint = record_fingerprint(item)
+        if not fingerprint:
+            return
+        
+        item_id = len(self._titles)
+        self._titles.append(title)
+        self._token_counts.append(len(fingerprint))
+        for token in fingerprint:
+            self._postings.setdefault(token, []).append(item_id)
+    
+    def has_link(self, link):
+        """Есть ли такая ссылка среди опубликованных"""
+        return bool(link) and link in self._links
+    
+    def similar_titles(self, title, threshold=None):
+        """Заголовки с Jaccard >= threshold: список (title, similarity)"""
+        return self.similar_fingerprints(title_fingerprint(title) if title else (), threshold)
+    
+    def similar_fingerprints(self, fingerprint, threshold=None):
+        """То же по готовому отпечатку заголовка"""
+        if threshold is None:
+            threshold = self.threshold
+        
+        if not fingerprint:
+            return []
+        
+        shared = {}
+        for token in fingerprint:
+            for item_id in self._postings.get(token, ()):
+                shared[item_id] = shared.get(item_id, 0) + 1
+        
+        matches = []
+        for item_id, intersection in shared.items():
+            union = len(fingerprint) + self._token_counts[item_id] - intersection
+            similarity = intersection / union
+            if similarity >= threshold:
+                matches.append((self._titles[item_id], similarity))
+        
+        return matches
+    
+    def is_duplicate(self, news_item):
+        """Дубликат по ссылке или по похожему заголовку"""
+        if self.has_link(news_item.get('link', '')):
+            return True
+        
+        return bool(self.similar_fingerprints(normalized_title(news_item).fingerprint))
+
+
+def cluster_news(news_list, threshold, sort_key):
+    """Группируем почти одинаковые новости партии в кластеры
+    
+    Новости сортируются по sort_key (лучшие первыми) и проходятся один раз,
+    токены заголовка берутся из NormalizedTitle, кандидаты-лидеры ищутся
+    через инвертированный индекс. Новость попадает в
+    первый по порядку кластер, с лидером которого Jaccard >= threshold, иначе
+    открывает новый. Возвращает список кластеров [лидер, дубликаты...].
+    """
+    clusters = []
+    leader_sizes = []
+    postings = {}
+    
+    for item in sorted(news_list, key=sort_key):
+        tokens = normalized_title(item).tokens
+        
+        shared = {}
+        for token in tokens:
+            for cluster_id in postings.get(token, ()):
+                shared[cluster_id] = shared.get(cluster_id, 0) + 1
+        
+        target = None
+        for cluster_id in sorted(shared):
+            intersection = shared[cluster_id]
+            union = len(tokens) + leader_sizes[cluster_id] - intersection
+            if intersection / union >= threshold:
+                target = cluster_id
+                break
+        
+        if target is not None:
+            clusters[target].append(item)
+            continue
+        
+        cluster_id = len(clusters)
+        clusters.append([item])
+        leader_sizes.append(len(tokens))
+        for token in tokens:
+            postings.setdefault(token, []).append(cluster_id)
+    
+    return clusters
@@ -0,0 +1,429 @@
+"""Хранилище опубликованных новостей
+
+Append-only JSONL (по умолчанию): каждая опубликованная новость - одна
+строка. Запуск дописывает только новые строки, файл переписывается
+(атомарно) лишь при компактификации, когда просроченных по retention строк
+набирается много. В git diff попадают только новые строки.
+
+SQLite (HISTORY_BACKEND = 'sqlite'): индексы по ссылкам, токенам заголовков
+и датам для длинной истории.
+
+Каждая запись хранит отпечаток заголовка (отсортированные 64-битные хэши
+токенов, news_dedup.title_fingerprint): проверка дубликатов читает его как
+есть и не токенизирует историю. Старые записи без отпечатка получают его
+при загрузке.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from news_dedup import (
+    DuplicateIndex,
+    title_fingerprint,
+    normalized_title,
+    record_fingerprint,
+    encode_fingerprint,
+    fingerprint_to_bytes
+)
+
+
+def _parse_date(value):
+    """ISO дата записи или None"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_valid_record(record):
+    return isinstance(record, dict) and bool(record.get('title'))
+
+
+def _signed(token):
+    """uint64 хэш токена -> INTEGER SQLite (знаковый 64-битный)"""
+    return token - (1 << 64) if token >= 1 << 63 else token
+
+
+class JsonlHistory:
+    """История публикаций в append-only JSONL с индексом для проверки дубликатов
+    
+    retention_days=None - хранить все записи. compact_ratio - доля просроченных
+    строк, при которой файл переписывается без них.
+    """
+    
+    def __init__(self, path, retention_days=7, compact_ratio=0.2, legacy_path=None):
+        self.path = path
+        self.retention_days = retention_days
+        self.compact_ratio = compact_ratio
+        self.legacy_path = legacy_path
+        self.records = []
+        self.index = DuplicateIndex()
+        self._pending = []
+        self._dropped = 0
+        self._rewrite = False
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def _cutoff(self):
+        if self.retention_days is None:
+            return None
+        return datetime.now() - timedelta(days=self.retention_days)
+    
+    def _keep(self, record, cutoff):
+        """Запись жива: есть заголовок и не старше retention (битая дата - живая)"""
+        if not _is_valid_record(record):
+            return False
+        if cutoff is None:
+            return True
+        pub_date = _parse_date(record.get('published_date'))
+        return pub_date is None or pub_date >= cutoff
+    
+    def _read_records(self):
+        """Все строки файла; битые (например, недописанная последняя) пропускаются"""
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self._dropped += 1
+                    self._rewrite = True
+        return records
+    
+    def _read_legacy(self):
+        """Старый published_news.json (один JSON список) для миграции"""
+        if not self.legacy_path:
+            return None
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                published = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return published if isinstance(published, list) else None
+    
+    def load(self):
+        """Загружаем живые записи и строим индекс дубликатов"""
+        try:
+            raw = self._read_records()
+        except FileNotFoundError:
+            raw = self._read_legacy()
+            if raw is None:
+                print(f"⚠ {self.path} not found, creating new")
+                raw = []
+            else:
+                print(f"✓ Migrating {len(raw)} items from {self.legacy_path}")
+                self._rewrite = True
+        
+        self.records = [record for record in raw if _is_valid_record(record)]
+        self._dropped += len(raw) - len(self.records)
+        
+        missing = [record for record in self.records if not record.get('fp')]
+        for record in missing:
+            record['fp'] = encode_fingerprint(title_fingerprint(record['title']))
+        if missing:
+            print(f"✓ Added title fingerprints to {len(missing)} records")
+            self._rewrite = True
+        
+        self.expire(rebuild_index=True)
+        
+        print(f"✓ Loaded {len(self.records)} items from {self.path} ({self._dropped} expired or invalid)")
+        return self
+    
+    def expire(self, rebuild_index=False):
+        """Убираем просроченные по retention записи из памяти и индекса
+        
+        Файл переписывается в save, когда их доля достигает compact_ratio.
+        """
+        cutoff = self._cutoff()
+        live = [record for record in self.records if self._keep(record, cutoff)]
+        expired = len(self.records) - len(live)
+        
+        if expired:
+            self.records = live
+            self._dropped += expired
+        if expired or rebuild_index:
+            self.index = DuplicateIndex(self.records)
+        
+        total = len(self.records) + self._dropped
+        if self._dropped and self._dropped >= self.compact_ratio * total:
+            self._rewrite = True
+        
+        return expired
+    
+    def has_link(self, link):
+        return self.index.has_link(link)
+    
+    def similar_titles(self, title, threshold=None):
+        return self.index.similar_titles(title, threshold)
+    
+    def similar_fingerprints(self, fingerprint, threshold=None):
+        return self.index.similar_fingerprints(fingerprint, threshold)
+    
+    def is_duplicate(self, news_item):
+        return self.index.is_duplicate(news_item)
+    
+    def add(self, title, link='', published_date=None, fingerprint=None):
+        """Добавляем опубликованную новость (на диск попадет в save)"""
+        record = {
+            'title': title,
+            'link': link,
+            'published_date': (published_date or datetime.now()).isoformat(),
+            'fp': encode_fingerprint(fingerprint if fingerprint is not None else title_fingerprint(title))
+        }
+        self.records.append(record)
+        self._pending.append(record)
+        self.index.add(record)
+        return record
+    
+    @staticmethod
+    def _dump(record):
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    
+    def save(self):
+        """Дописываем новые строки или, если пора, атомарно переписываем файл"""
+        if self._rewrite:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(self._dump(record) for record in self.records)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            print(f"✓ Compacted {self.path}: {len(self.records)} items (dropped {self._dropped})")
+            self._dropped = 0
+            self._rewrite = False
+        elif self._pending:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(self._dump(record) for record in self._pending))
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"✓ Appended {len(self._pending)} items to {self.path}")
+        
+        self._pending = []
+    
+    def close(self):
+        """Для совместимости с SQLiteHistory - файл не держим открытым"""
+        self.save()
+
+
+def read_history_file(path):
+    """Записи из published_news.json (список) или published_news.jsonl (строки)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    try:
+        data = json.loads(content)
+        if isinstance(data, list):
+            return [record for record in data if _is_valid_record(record)]
+    except json.JSONDecodeError:
+        pass
+    
+    records = []
+    for line in content.splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if _is_valid_record(record):
+            records.append(record)
+    return records
+
+
+class SQLiteHistory:
+    """История публикаций в SQLite (WAL) с индексами
+    
+    Индексы по link и published_date, таблица title_hashes (хэш токена из
+    отпечатка -> запись) для поиска кандидатов на похожий заголовок, сам
+    отпечаток лежит в published.fingerprint. Retention - один DELETE по
+    индексу дат, поэтому можно держать 90+ дней истории без линейных сканов.
+    Интерфейс тот же, что у JsonlHistory.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS published (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL DEFAULT '',
+            published_date TEXT NOT NULL,
+            token_count INTEGER NOT NULL,
+            fingerprint BLOB
+        );
+        CREATE INDEX IF NOT EXISTS idx_published_link ON published(link);
+        CREATE INDEX IF NOT EXISTS idx_published_date ON published(published_date);
+        CREATE TABLE IF NOT EXISTS title_hashes (
+            hash INTEGER NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES published(id) ON DELETE CASCADE,
+            PRIMARY KEY (hash, item_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_title_hashes_item ON title_hashes(item_id);
+    """
+    
+    def __init__(self, path, retention_days=7, legacy_path=None, threshold=0.5):
+        self.path = path
+        self.retention_days = retention_days
+        self.legacy_path = legacy_path
+        self.threshold = threshold
+        self.conn = None
+    
+    def load(self):
+        """Открываем базу, мигрируем старую историю, чистим просроченное"""
+        import sqlite3
+        
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(self.SCHEMA)
+        self._migrate_fingerprints()
+        
+        if len(self) == 0 and self.legacy_path and os.path.exists(self.legacy_path):
+            records = read_history_file(self.legacy_path)
+            for record in records:
+                self.add(record['title'], record.get('link', ''), _parse_date(record.get('published_date')),
+                         record_fingerprint(record))
+            self.conn.commit()
+            print(f"✓ Migrated {len(records)} items from {self.legacy_path} to {self.path}")
+        
+        removed = self.expire()
+        print(f"✓ Loaded {len(self)} items from {self.path} ({removed} expired)")
+        return self
+    
+    def _migrate_fingerprints(self):
+        """База до отпечатков: колонка fingerprint и title_hashes вместо title_tokens"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(published)')}
+        if 'fingerprint' in columns:
+            return
+        self.conn.execute('ALTER TABLE published ADD COLUMN fingerprint BLOB')
+        
+        rows = self.conn.execute('SELECT id, title FROM published WHERE fingerprint IS NULL').fetchall()
+        with self.conn:
+            for item_id, title in rows:
+                self._store_fingerprint(item_id, title_fingerprint(title))
+            self.conn.execute('DROP TABLE IF EXISTS title_tokens')
+        
+        if rows:
+            print(f"✓ Added title fingerprints to {len(rows)} records in {self.path}")
+    
+    def _store_fingerprint(self, item_id, fingerprint):
+        self.conn.execute(
+            'UPDATE published SET fingerprint = ?, token_count = ? WHERE id = ?',
+            (fingerprint_to_bytes(fingerprint), len(fingerprint), item_id)
+        )
+        self.conn.execute('DELETE FROM title_hashes WHERE item_id = ?', (item_id,))
+        self.conn.executemany(
+            'INSERT INTO title_hashes (hash, item_id) VALUES (?, ?)',
+            [(_signed(token), item_id) for token in fingerprint]
+        )
+    
+    def expire(self):
+        """Удаляем просроченные по retention записи одним DELETE по индексу дат"""
+        if self.retention_days is None:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+        with self.conn:
+            return self.conn.execute('DELETE FROM published WHERE published_date < ?', (cutoff,)).rowcount
+    
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM published').fetchone()[0]
+    
+    def has_link(self, link):
+        if not link:
+            return False
+        return self.conn.execute('SELECT 1 FROM published WHERE link = ? LIMIT 1', (link,)).fetchone() is not None
+    
+    def similar_titles(self, title, threshold=None):
+        """Заголовки с Jaccard >= threshold: список (title, similarity)"""
+        return self.similar_fingerprints(title_fingerprint(title) if title else (), threshold)
+    
+    def similar_fingerprints(self, fingerprint, threshold=None):
+        """То же по готовому отпечатку заголовка"""
+        if threshold is None:
+            threshold = self.threshold
+        
+        if not fingerprint:
+            return []
+        
+        placeholders = ','.join('?' * len(fingerprint))
+        rows = self.conn.execute(
+            f"""SELECT p.title, p.token_count, COUNT(*)
+                FROM title_hashes t JOIN published p ON p.id = t.item_id
+                WHERE t.hash IN ({placeholders})
+                GROUP BY t.item_id""",
+            tuple(_signed(token) for token in fingerprint)
+        )
+        
+        matches = []
+        for pub_title, token_count, intersection in rows:
+            similarity = intersection / (len(fingerprint) + token_count - intersection)
+            if similarity >= threshold:
+                matches.append((pub_title, similarity))
+        return matches
+    
+    def is_duplicate(self, news_item):
+        if self.has_link(news_item.get('link', '')):
+            return True
+        return bool(self.similar_fingerprints(normalized_title(news_item).fingerprint))
+    
+    def add(self, title, link='', published_date=None, fingerprint=None):
+        """Добавляем опубликованную новость (коммит в save)"""
+        if fingerprint is None:
+            fingerprint = title_fingerprint(title)
+        record = {
+            'title': title,
+            'link': link or '',
+            'published_date': (published_date or datetime.now()).isoformat()
+        }
+        cursor = self.conn.execute(
+            'INSERT INTO published (title, link, published_date, token_count, fingerprint) VALUES (?, ?, ?, ?, ?)',
+            (record['title'], record['link'], record['published_date'], len(fingerprint),
+             fingerprint_to_bytes(fingerprint))
+        )
+        self.conn.executemany(
+            'INSERT INTO title_hashes (hash, item_id) VALUES (?, ?)',
+            [(_signed(token), cursor.lastrowid) for token in fingerprint]
+        )
+        return record
+    
+    def save(self):
+        """Коммитим и сливаем WAL в основной файл (база коммитится в git)"""
+        self.conn.commit()
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        print(f"✓ Saved {len(self)} published items to {self.path}")
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def migrate_to_sqlite(source_path, db_path):
+    """Разовая миграция published_news.json / .jsonl в SQLite"""
+    history = SQLiteHistory(db_path, retention_days=None).load()
+    try:
+        if len(history):
+            print(f"⚠ {db_path} is not empty, skipping migration")
+            return 0
+        
+        records = read_history_file(source_path)
+        for record in records:
+            history.add(record['title'], record.get('link', ''), _parse_date(record.get('published_date')),
+                        record_fingerprint(record))
+        history.save()
+        return len(records)
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    import sys
+    
+    if len(sys.argv) != 3:
+        print("Usage: python news_history.py <published_news.json[l]> <published_news.db>")
+        sys.exit(1)
+    
+    migrated = migrate_to_sqlite(sys.argv[1], sys.argv[2])
+    print(f"✓ Migrated {migrated} items")
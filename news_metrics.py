@@ -0,0 +1,238 @@
+"""Метрики этапов бота: время вызовов и счетчики новостей
+
+    @timed('calculate_importance')
+    def calculate_importance(news_item): ...
+    
+    with timer('fetch_stage'):
+        ...
+    
+    count('importance', items_in=len(new_news), items_out=len(scored_news))
+
+В конце запуска write_metrics() пишет JSON сводку (METRICS_FILE) и, если
+задан PROMETHEUS_TEXTFILE, файл для textfile collector node_exporter.
+Метрики общие для процесса и потокобезопасны (fetch идет в потоках).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from news_config import METRICS_FILE, PROMETHEUS_TEXTFILE
+
+
+class Metrics:
+    """Реестр таймингов (calls / total / max) и счетчиков in/out по этапам"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+            self.started = time.time()
+    
+    def observe(self, name, seconds):
+        """Учитываем один вызов длительностью seconds"""
+        with self._lock:
+            stats = self.timings.get(name)
+            if stats is None:
+                stats = self.timings[name] = {'calls': 0, 'total': 0.0, 'max': 0.0}
+            stats['calls'] += 1
+            stats['total'] += seconds
+            if seconds > stats['max']:
+                stats['max'] = seconds
+    
+    def count(self, stage, items_in=0, items_out=0):
+        """Сколько новостей вошло в этап и сколько из него вышло"""
+        with self._lock:
+            stats = self.counters.get(stage)
+            if stats is None:
+                stats = self.counters[stage] = {'in': 0, 'out': 0}
+            stats['in'] += items_in
+            stats['out'] += items_out
+    
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+    
+    def timed(self, name=None):
+        """Декоратор: время каждого вызова функции"""
+        def decorator(func):
+            metric = name or func.__name__
+            
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(metric, time.perf_counter() - started)
+            
+            return wrapper
+        return decorator
+    
+    def summary(self):
+        """Сводка для JSON: время по функциям (мс) и счетчики этапов"""
+        with self._lock:
+            timings = {
+                name: {
+                    'calls': stats['calls'],
+                    'total_ms': round(stats['total'] * 1000, 3),
+                    'avg_ms': round(stats['total'] * 1000 / stats['calls'], 3),
+                    'max_ms': round(stats['max'] * 1000, 3)
+                }
+                for name, stats in sorted(self.timings.items())
+            }
+            counters = {stage: dict(stats) for stage, stats in sorted(self.counters.items())}
+            started = self.started
+        
+        return {
+            'started_at': round(started, 3),
+            'duration_s': round(time.time() - started, 3),
+            'timings': timings,
+            'stages': counters
+        }
+    
+    def prometheus(self, prefix='crypto_news'):
+        """Метрики в text exposition format Prometheus"""
+        with self._lock:
+            timings = sorted(self.timings.items())
+            counters = sorted(self.counters.items())
+        
+        lines = []
+        
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for label, value in samples:
+                lines.append(f'{prefix}_{name}{{stage="{label}"}} {value}')
+        
+        metric('calls_total', 'counter', 'Instrumented function calls',
+               [(name, stats['calls']) for name, stats in timings])
+        metric('seconds_total', 'counter', 'Time spent in instrumented function',
+               [(name, f"{stats['total']:.6f}") for name, stats in timings])
+        metric('seconds_max', 'gauge', 'Slowest single call',
+               [(name, f"{stats['max']:.6f}") for name, stats in timings])
+        metric('items_in_total', 'counter', 'News items entering stage',
+               [(stage, stats['in']) for stage, stats in counters])
+        metric('items_out_total', 'counter', 'News items leaving stage',
+               [(stage, stats['out']) for stage, stats in counters])
+        
+        lines.append(f"# HELP {prefix}_last_run_timestamp_seconds Time metrics were written")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+    
+    def print_summary(self):
+        summary = self.summary()
+        print("\n⏱ Stage timings:")
+        for name, stats in sorted(summary['timings'].items(), key=lambda x: -x[1]['total_ms']):
+            print(f"  {name:28} {stats['calls']:6} calls {stats['total_ms']:10.1f} ms (max {stats['max_ms']:.1f} ms)")
+        if summary['stages']:
+            print("📊 Stage items:")
+        for stage, stats in summary['stages'].items():
+            print(f"  {stage:28} {stats['in']:6} in {stats['out']:6} out")
+
+
+def _write_atomic(path, content):
+    """tmp + rename: textfile collector не должен видеть недописанный файл"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+
+timed = METRICS.timed
+timer = METRICS.timer
+count = METRICS.count
+
+
+# Что news_parser подгружает только на своих этапах
+LAZY_IMPORTS = ('requests', 'feedparser', 'openai', 'PIL.Image', 'tweepy')
+
+
+def _parse_importtime(stderr):
+    """Строки python -X importtime -> [(module, self_us, cumulative_us, depth)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+_PROFILE_SCRIPT = """
+import importlib, json, sys, time
+started = time.perf_counter()
+import news_parser
+timings = {'news_parser': time.perf_counter() - started}
+for module in sys.argv[1:]:
+    started = time.perf_counter()
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        continue
+    timings[module] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def profile_startup(top=10):
+    """Время импорта news_parser (по модулям) и каждой ленивой зависимости
+    
+    Замер в отдельном процессе с python -X importtime - холодный старт как в cron.
+    """
+    import subprocess
+    import sys
+    
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROFILE_SCRIPT, *LAZY_IMPORTS],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    
+    # importtime печатает модуль после всех его зависимостей: поддерево
+    # news_parser - строки между предыдущим импортом верхнего уровня и им
+    subtree = []
+    for row in _parse_importtime(result.stderr):
+        subtree.append(row)
+        if row[3] == 0:
+            if row[0] == 'news_parser':
+                break
+            subtree = []
+    
+    print(f"⏱ Startup: import news_parser {timings['news_parser'] * 1000:.1f} ms")
+    print("  slowest modules (self time):")
+    for name, self_us, _, _ in sorted(subtree, key=lambda row: -row[1])[:top]:
+        print(f"    {name:36} {self_us / 1000:8.1f} ms")
+    
+    print("  loaded on demand:")
+    for module in LAZY_IMPORTS:
+        if module in timings:
+            print(f"    {module:36} {timings[module] * 1000:8.1f} ms")
+        else:
+            print(f"    {module:36} not installed")
+
+
+def write_metrics(metrics_file=METRICS_FILE, prometheus_file=PROMETHEUS_TEXTFILE):
+    """Пишем JSON сводку и (опционально) Prometheus textfile"""
+    try:
+        if metrics_file:
+            _write_atomic(metrics_file, json.dumps(METRICS.summary(), indent=2, sort_keys=True))
+        if prometheus_file:
+            _write_atomic(prometheus_file, METRICS.prometheus())
+    except OSError as e:
+        print(f"⚠ Failed to write metrics: {e}")
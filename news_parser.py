@@ -4,25 +4,30 @@
 Крипто новостной бот с AI анализом
 Парсит RSS, фильтрует важные новости, генерирует Alpha Take через OpenAI
 Публикует в Telegram и Twitter
+
+Тяжелые зависимости (requests, feedparser, openai, PIL, tweepy) импортируются
+там, где нужны: запуск без новостей не тратит время на openai и tweepy, а без
+изменившихся feeds - и на feedparser. python news_parser.py --profile-startup
+показывает время импорта по модулям.
 """
 
-import feedparser
-import requests
 import os
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import re
 import html
 import io
+import time
+import hashlib
+import threading
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
-# OpenAI Integration
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("⚠️ OpenAI not available - Alpha Take will be skipped")
-
+from news_dedup import tokenize_title, jaccard, DuplicateIndex, cluster_news, NormalizedTitle, normalized_title
+from news_history import JsonlHistory, SQLiteHistory
+from news_metrics import timed, count, METRICS, write_metrics
+from news_rss import iter_rss2, FastParserError
+from news_archive import ARCHIVE, archive, REJECT_DUPLICATE, REJECT_LOW_SCORE, REJECT_SIMILAR, REJECT_NOT_IN_TOP
 from news_config import (
     RSS_SOURCES, 
     IMPORTANCE_RULES, 
@@ -30,198 +35,535 @@ from news_config import (
     MIN_IMPORTANCE_SCORE,
     STOCK_MARKET_THRESHOLD,
     SOURCE_PRIORITY,
-    TWITTER_ENABLED
+    BATCH_SIMILARITY_THRESHOLD,
+    TELEGRAM_DIGEST_MODE,
+    TWITTER_ENABLED,
+    FETCH_MAX_WORKERS,
+    FETCH_CONNECT_TIMEOUT,
+    FETCH_READ_TIMEOUT,
+    FETCH_TOTAL_TIMEOUT,
+    SEEN_ENTRIES_TTL_HOURS,
+    FAST_PARSER_MAX_AGE_HOURS,
+    ALPHA_TAKE_MAX_WORKERS,
+    ALPHA_CACHE_TTL_HOURS,
+    ALPHA_CACHE_MAX_ENTRIES,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_MAX_RETRY_AFTER,
+    HTTP_POOL_SIZE,
+    WATERMARK_CROP_PIXELS,
+    IMAGE_MAX_DOWNLOAD_BYTES,
+    IMAGE_MAX_DIMENSION,
+    IMAGE_CACHE_DIR,
+    IMAGE_CACHE_MAX_FILES,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_COMPACT_RATIO,
+    HISTORY_BACKEND
 )
 
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHANNEL_ID = os.environ.get('TELEGRAM_CHANNEL_ID')
+TELEGRAM_API_BASE = os.environ.get('TELEGRAM_API_BASE', 'https://api.telegram.org')  # Свой Bot API сервер / заглушка
 
 TWITTER_API_KEY = os.environ.get('TWITTER_API_KEY')
 TWITTER_API_SECRET = os.environ.get('TWITTER_API_SECRET')
 TWITTER_ACCESS_TOKEN = os.environ.get('TWITTER_ACCESS_TOKEN')
 TWITTER_ACCESS_TOKEN_SECRET = os.environ.get('TWITTER_ACCESS_TOKEN_SECRET')
 
-PUBLISHED_FILE = 'published_news.json'
+PUBLISHED_FILE = 'published_news.jsonl'
+LEGACY_PUBLISHED_FILE = 'published_news.json'
+PUBLISHED_DB_FILE = 'published_news.db'
+FEED_CACHE_FILE = os.path.join(os.path.dirname(PUBLISHED_FILE), 'feed_cache.json')
+SEEN_ENTRIES_FILE = os.path.join(os.path.dirname(PUBLISHED_FILE), 'seen_entries.json')
+ALPHA_CACHE_FILE = os.path.join(os.path.dirname(PUBLISHED_FILE), 'alpha_cache.json')
+
+USER_AGENT = 'Mozilla/5.0 (compatible; CryptoNewsBot/1.5; +https://github.com/qq504111/crypto-news-bot)'
 
+STOCK_SOURCES = ['marketwatch', 'yahoo_finance', 'reuters']  # Порог STOCK_MARKET_THRESHOLD
 
-def fetch_rss_feed(source_name, feed_config):
-    """Парсим RSS feed"""
+
+def load_json_state(path, default):
+    """Загружаем вспомогательный JSON файл состояния (кэши, индексы)"""
     try:
-        feed = feedparser.parse(feed_config['url'])
-        
-        if not feed.entries:
-            return []
-        
-        news_items = []
-        for entry in feed.entries:
-            title = entry.get('title', '').strip()
-            link = entry.get('link', '')
-            summary = entry.get('summary', entry.get('description', '')).strip()
-            
-            if summary:
-                summary = re.sub('<.*?>', '', summary)
-                summary = html.unescape(summary)
-            
-            published = entry.get('published_parsed') or entry.get('updated_parsed')
-            published_date = datetime(*published[:6]) if published else datetime.now()
-            
-            image_url = None
-            if 'media_content' in entry:
-                image_url = entry.media_content[0].get('url')
-            elif 'enclosures' in entry and entry.enclosures:
-                image_url = entry.enclosures[0].get('href')
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        print(f"⚠ {path} corrupted, starting fresh")
+        return default
+
+
+def save_json_state(path, data):
+    """Атомарно сохраняем JSON файл состояния (через временный файл)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_feed_cache():
+    """Загружаем ETag / Last-Modified / digest по каждому источнику"""
+    return load_json_state(FEED_CACHE_FILE, {})
+
+
+def save_feed_cache(feed_cache):
+    """Сохраняем кэш валидаторов RSS"""
+    save_json_state(FEED_CACHE_FILE, feed_cache)
+
+
+def entry_key(entry):
+    """Стабильный ключ записи RSS: хэш GUID, иначе ссылки, иначе заголовка"""
+    raw = entry.get('id') or entry.get('guid') or entry.get('link') or entry.get('title', '')
+    return hashlib.sha1(raw.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def load_seen_entries():
+    """Загружаем индекс обработанных записей, выкидывая просроченные по TTL"""
+    seen = load_json_state(SEEN_ENTRIES_FILE, {})
+    cutoff = time.time() - SEEN_ENTRIES_TTL_HOURS * 3600
+    return {key: ts for key, ts in seen.items() if ts >= cutoff}
+
+
+def save_seen_entries(seen):
+    """Сохраняем индекс обработанных записей"""
+    save_json_state(SEEN_ENTRIES_FILE, seen)
+
+
+def prune_seen_entries(seen):
+    """Удаляем из индекса записи старше SEEN_ENTRIES_TTL_HOURS (для долгих процессов)"""
+    cutoff = time.time() - SEEN_ENTRIES_TTL_HOURS * 3600
+    for key in [key for key, ts in seen.items() if ts < cutoff]:
+        del seen[key]
+
+
+def mark_seen(seen, news_item):
+    """Помечаем запись как обработанную (отклонена или опубликована)"""
+    if seen is not None and news_item.get('entry_key'):
+        seen[news_item['entry_key']] = int(time.time())
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Общая requests.Session на процесс: keep-alive и пул соединений"""
+    global _http_session
+    
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
             
-            news_items.append({
-                'title': title,
-                'link': link,
-                'summary': summary[:300] if summary else '',
-                'published_date': published_date,
-                'source': source_name,
-                'source_weight': feed_config['weight_multiplier'],
-                'source_priority': feed_config['priority'],
-                'image_url': image_url
-            })
-        
-        return news_items
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _http_session = session
+        return _http_session
+
+
+def _retry_after(response):
+    """Сколько ждать по 429: parameters.retry_after от Telegram или заголовок Retry-After"""
+    try:
+        return float(response.json()['parameters']['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        pass
     
-    except Exception as e:
-        return []
+    try:
+        return float(response.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
 
 
-def fetch_all_news():
-    """Собираем новости из всех источников"""
-    print("\n📡 Fetching news from sources...")
-    all_news = []
+def _backoff_delay(attempt):
+    """Экспоненциальная пауза с jitter"""
+    return min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def _connection_not_made(error):
+    """Ошибка до установки соединения (connect timeout, отказ, DNS) - запрос точно не ушел"""
+    import requests
+    from urllib3.exceptions import NewConnectionError
     
-    for source_name, feed_config in RSS_SOURCES.items():
-        news = fetch_rss_feed(source_name, feed_config)
-        if news:
-            print(f"✓ Parsed {source_name}: {len(news)} entries")
-            all_news.extend(news)
-        else:
-            print(f"✗ {source_name}: Invalid RSS feed")
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    cause = error.args[0] if error.args else None
+    return isinstance(getattr(cause, 'reason', cause), NewConnectionError)
+
+
+def http_request(method, url, timeout=None, retries=HTTP_MAX_RETRIES, deadline=None, **kwargs):
+    """Запрос через общую сессию с таймаутами и повторами (POST - только если соединение не установлено)"""
+    import requests
     
-    print(f"Total news fetched: {len(all_news)}")
-    return all_news
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    
+    session = get_http_session()
+    attempt = 0
+    
+    while True:
+        for file_info in (kwargs.get('files') or {}).values():
+            if isinstance(file_info, tuple) and hasattr(file_info[1], 'seek'):
+                file_info[1].seek(0)
+        
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            retryable = method.upper() == 'GET' or _connection_not_made(e)
+            if not retryable or attempt >= retries:
+                raise
+            delay = _backoff_delay(attempt)
+            response = None
+        else:
+            if response.status_code == 429:
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = _backoff_delay(attempt)
+                elif delay > HTTP_MAX_RETRY_AFTER:
+                    return response
+            elif response.status_code >= 500:
+                delay = _backoff_delay(attempt)
+            else:
+                return response
+            
+            if attempt >= retries:
+                return response
+        
+        if deadline is not None and time.monotonic() + delay > deadline:
+            if response is not None:
+                return response
+            raise TimeoutError(f"deadline exceeded before retrying {url}")
+        
+        if response is not None:
+            print(f"  ⏳ HTTP {response.status_code} from {url.split('/bot')[0]}, retrying in {delay:.1f}s")
+            response.close()
+        time.sleep(delay)
+        attempt += 1
 
 
-def load_published_news():
-    """Загружаем опубликованные новости"""
+def download_feed(url, deadline=None, validators=None):
+    """Скачиваем RSS с таймаутами и conditional GET по validators; на 304 - (None, headers)"""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    
+    response = http_request(
+        'GET',
+        url,
+        headers=headers,
+        timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT),
+        retries=1,
+        deadline=deadline,
+        stream=True
+    )
     try:
-        with open(PUBLISHED_FILE, 'r', encoding='utf-8') as f:
-            published = json.load(f)
-            print(f"✓ Loaded {len(published)} items from {PUBLISHED_FILE}")
-            return published
-    except FileNotFoundError:
-        print(f"⚠ {PUBLISHED_FILE} not found, creating new")
-        return []
-    except json.JSONDecodeError:
-        print(f"⚠ {PUBLISHED_FILE} corrupted, starting fresh")
-        return []
+        if response.status_code == 304:
+            return None, dict(response.headers)
+        
+        response.raise_for_status()
+        
+        chunks = []
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"deadline exceeded while reading {url}")
+            chunks.append(chunk)
+        
+        return b''.join(chunks), dict(response.headers)
+    finally:
+        response.close()
 
 
-def save_published_news(published):
-    """Сохраняем опубликованные новости"""
-    with open(PUBLISHED_FILE, 'w', encoding='utf-8') as f:
-        json.dump(published, f, ensure_ascii=False, indent=2)
-    print(f"✓ Saved {len(published)} published items to {PUBLISHED_FILE}")
+def iter_feed_entries(source_name, feed_config, body, headers):
+    """Записи feed по одной: news_rss для fast_parser источников, иначе или при ошибке - feedparser"""
+    yielded = set()
+    if feed_config.get('fast_parser'):
+        try:
+            for entry in iter_rss2(body, cutoff=time.time() - FAST_PARSER_MAX_AGE_HOURS * 3600):
+                yielded.add(entry_key(entry))
+                yield entry
+            if yielded or b'<item' in body:
+                return
+            raise FastParserError("no <item> elements")
+        except FastParserError as e:
+            print(f"  ⚠ {source_name}: {e}, falling back to feedparser")
+    
+    import feedparser
+    
+    feed = feedparser.parse(body, response_headers=headers)
+    if not feed.entries and not yielded:
+        raise ValueError("Invalid RSS feed")
+    for entry in feed.entries:
+        if entry_key(entry) not in yielded:
+            yield entry
 
 
-def cleanup_old_news(published, days=7):
-    """Удаляем старые записи"""
-    cutoff_date = datetime.now() - timedelta(days=days)
+def iter_rss_feed(source_name, feed_config, deadline=None, feed_cache=None, seen=None, make_item=dict,
+                  validators=None):
+    """Новости feed по одной, make_item(**поля) строит запись; новые validators - в validators"""
+    cached = feed_cache.get(source_name, {}) if feed_cache is not None else {}
+    if cached.get('url') != feed_config['url']:
+        cached = {}
+    
+    body, headers = download_feed(feed_config['url'], deadline, validators=cached)
+    if body is None:
+        return
     
-    cleaned = []
-    for item in published:
-        if isinstance(item, str):
+    digest = hashlib.sha256(body).hexdigest()
+    if digest == cached.get('digest'):
+        return
+    
+    total = 0
+    new = 0
+    for entry in iter_feed_entries(source_name, feed_config, body, headers):
+        total += 1
+        key = entry_key(entry)
+        if seen is not None and key in seen:
             continue
         
-        if not item.get('title'):
-            continue
+        title = entry.get('title', '').strip()
+        link = entry.get('link', '')
+        summary = entry.get('summary', entry.get('description', '')).strip()
         
-        try:
-            pub_date = datetime.fromisoformat(item['published_date'])
-            if pub_date >= cutoff_date:
-                cleaned.append(item)
-        except (ValueError, KeyError):
-            cleaned.append(item)
-    
-    removed = len(published) - len(cleaned)
-    if removed > 0:
-        print(f"✓ After cleanup: {len(cleaned)} items (removed {removed} old, {len([x for x in published if not isinstance(x, dict) or not x.get('title')])} without titles)")
-    else:
-        print(f"✓ After cleanup: {len(cleaned)} items (removed 0 old, 0 without titles)")
+        if summary:
+            summary = re.sub('<.*?>', '', summary)
+            summary = html.unescape(summary)
+        
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        published_date = datetime(*published[:6]) if published else datetime.now()
+        
+        image_url = None
+        if entry.get('media_content'):
+            image_url = entry['media_content'][0].get('url')
+        elif entry.get('enclosures'):
+            image_url = entry['enclosures'][0].get('href')
+        
+        new += 1
+        yield make_item(
+            title=title,
+            link=link,
+            summary=summary[:300] if summary else '',
+            published_date=published_date,
+            source=source_name,
+            source_weight=feed_config['weight_multiplier'],
+            source_priority=feed_config['priority'],
+            image_url=image_url,
+            entry_key=key,
+            norm=NormalizedTitle(title)
+        )
     
-    return cleaned
+    count('fetch', items_in=total, items_out=new)
+    
+    if validators is not None:
+        validators.update({
+            'url': feed_config['url'],
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'digest': digest
+        })
 
 
-def calculate_similarity(title1, title2):
-    """Jaccard similarity для заголовков"""
-    def tokenize(text):
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', '', text)
-        return set(text.split())
+@timed('fetch_rss_feed')
+def fetch_rss_feed(source_name, feed_config, deadline=None, feed_cache=None, seen=None, validators=None):
+    """Парсим RSS feed: список новостей, [] если feed не изменился, None при ошибке"""
+    try:
+        return list(iter_rss_feed(source_name, feed_config, deadline, feed_cache, seen, validators=validators))
+    except Exception as e:
+        return None
+
+
+def _fetch_with_latency(source_name, feed_config, deadline, feed_cache, seen):
+    """fetch_rss_feed + замер времени для одного источника"""
+    started = time.monotonic()
+    validators = {}
+    news = fetch_rss_feed(source_name, feed_config, deadline, feed_cache, seen, validators)
+    return news, validators, time.monotonic() - started
+
+
+@timed('fetch_all_news')
+def fetch_all_news(sources=None, feed_cache=None, seen=None, report=None):
+    """Собираем новости из всех источников параллельно, не дольше FETCH_TOTAL_TIMEOUT"""
+    print("\n📡 Fetching news from sources...")
+    if sources is None:
+        sources = RSS_SOURCES
     
-    tokens1 = tokenize(title1)
-    tokens2 = tokenize(title2)
+    started = time.monotonic()
+    deadline = started + FETCH_TOTAL_TIMEOUT
+    results = {}
+    latencies = {}
     
-    if not tokens1 or not tokens2:
-        return 0.0
+    executor = ThreadPoolExecutor(max_workers=max(1, min(FETCH_MAX_WORKERS, len(sources))))
+    futures = {
+        executor.submit(_fetch_with_latency, source_name, feed_config, deadline, feed_cache, seen): source_name
+        for source_name, feed_config in sources.items()
+    }
     
-    intersection = len(tokens1.intersection(tokens2))
-    union = len(tokens1.union(tokens2))
+    try:
+        for future in as_completed(futures, timeout=FETCH_TOTAL_TIMEOUT):
+            source_name = futures[future]
+            news, validators, latency = future.result()
+            results[source_name] = news
+            latencies[source_name] = latency
+            if feed_cache is not None and validators:
+                feed_cache[source_name] = validators
+            
+            if report is not None:
+                status = 'ok' if news else ('not_modified' if news is not None else 'error')
+                report[source_name] = {'status': status, 'entries': len(news or []), 'latency': latency}
+            
+            if news:
+                print(f"✓ Parsed {source_name}: {len(news)} entries ({latency:.2f}s)")
+            elif news is not None:
+                print(f"= {source_name}: No new entries ({latency:.2f}s)")
+            else:
+                print(f"✗ {source_name}: Invalid RSS feed ({latency:.2f}s)")
+    except FuturesTimeoutError:
+        for future, source_name in futures.items():
+            if not future.done():
+                print(f"✗ {source_name}: Timed out after {FETCH_TOTAL_TIMEOUT}s")
+                if report is not None:
+                    report[source_name] = {'status': 'timeout', 'entries': 0, 'latency': FETCH_TOTAL_TIMEOUT}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    return intersection / union if union > 0 else 0.0
+    # Порядок источников как в конфиге - результат не зависит от того, кто ответил первым
+    all_news = []
+    for source_name in sources:
+        all_news.extend(results.get(source_name) or [])
+    
+    elapsed = time.monotonic() - started
+    if latencies:
+        slowest = max(latencies, key=latencies.get)
+        print(f"Fetch stage: {elapsed:.2f}s (slowest: {slowest} {latencies[slowest]:.2f}s)")
+    
+    print(f"Total news fetched: {len(all_news)}")
+    return all_news
 
 
+def load_published_history():
+    """Загружаем историю публикаций (HISTORY_BACKEND), старые форматы мигрируют сами"""
+    if HISTORY_BACKEND == 'sqlite':
+        return SQLiteHistory(
+            PUBLISHED_DB_FILE,
+            retention_days=HISTORY_RETENTION_DAYS,
+            legacy_path=PUBLISHED_FILE if os.path.exists(PUBLISHED_FILE) else LEGACY_PUBLISHED_FILE
+        ).load()
+    
+    return JsonlHistory(
+        PUBLISHED_FILE,
+        retention_days=HISTORY_RETENTION_DAYS,
+        compact_ratio=HISTORY_COMPACT_RATIO,
+        legacy_path=LEGACY_PUBLISHED_FILE
+    ).load()
+
+
+def calculate_similarity(title1, title2):
+    """Jaccard similarity для заголовков"""
+    return jaccard(tokenize_title(title1), tokenize_title(title2))
+
+
+@timed('is_duplicate')
 def is_duplicate(news_item, published):
-    """Проверяем дубликаты"""
-    link = news_item.get('link', '')
-    title = news_item.get('title', '')
+    """Проверяем дубликаты по истории (объект с is_duplicate) или списку записей"""
+    if isinstance(published, list):
+        published = DuplicateIndex(published)
     
-    for pub_item in published:
-        pub_link = pub_item.get('link', '')
-        pub_title = pub_item.get('title', '')
-        
-        if link and pub_link and link == pub_link:
-            return True
-        
-        if title and pub_title:
-            similarity = calculate_similarity(title, pub_title)
-            if similarity >= 0.5:
-                return True
+    return published.is_duplicate(news_item)
+
+
+def _keyword_trie_regex(keywords):
+    """Regex-trie по keywords: общие префиксы свернуты в одну ветку"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
     
-    return False
+    def build(node):
+        if '' in node:
+            return ''
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    
+    return build(trie)
+
+
+# Конфиг компилируется один раз при импорте в один автомат: keyword -> теги
+# (категории IMPORTANCE_RULES и EXCLUDED). Заголовок проходится одним regex
+# вместо сотен проверок `in` и .lower() на каждый keyword.
+KEYWORD_TAGS = {}
+for _category, _rules in IMPORTANCE_RULES.items():
+    for _keyword in _rules['keywords']:
+        KEYWORD_TAGS.setdefault(_keyword.lower(), set()).add(_category)
+for _keyword in EXCLUDE_KEYWORDS:
+    KEYWORD_TAGS.setdefault(_keyword, set()).add('EXCLUDED')
+
+KEYWORD_EXTENSIONS = {
+    keyword: [other for other in KEYWORD_TAGS if other != keyword and other.startswith(keyword)]
+    for keyword in KEYWORD_TAGS
+}
+KEYWORD_PATTERN = re.compile('(?=(' + _keyword_trie_regex(KEYWORD_TAGS) + '))') if KEYWORD_TAGS else None
+
+BTC_PATTERN = re.compile(r'\bbtc\b')
+
+
+def matched_keywords(title):
+    """keywords из KEYWORD_TAGS, входящие в title (уже в lowercase), за один проход"""
+    if KEYWORD_PATTERN is None:
+        return
+    
+    for match in KEYWORD_PATTERN.finditer(title):
+        keyword = match.group(1)
+        yield keyword
+        for longer in KEYWORD_EXTENSIONS[keyword]:
+            if title.startswith(longer, match.start()):
+                yield longer
+
+
+def match_keywords(title):
+    """Все теги keywords, входящих в title (уже в lowercase)"""
+    tags = set()
+    for keyword in matched_keywords(title):
+        tags |= KEYWORD_TAGS[keyword]
+    return tags
 
 
+@timed('calculate_importance')
 def calculate_importance(news_item):
     """Рассчитываем важность новости"""
-    title = news_item['title'].lower()
+    norm = normalized_title(news_item)
+    title = norm.lower
     score = 0
     matched_categories = []
     
-    for exclude in EXCLUDE_KEYWORDS:
-        if exclude in title:
-            return 0, ['EXCLUDED']
+    tags = match_keywords(title)
+    if 'EXCLUDED' in tags:
+        return 0, ['EXCLUDED']
     
     for category, rules in IMPORTANCE_RULES.items():
-        category_matched = False
-        for keyword in rules['keywords']:
-            if keyword.lower() in title:
-                score += rules['weight']
-                if category not in matched_categories:
-                    matched_categories.append(category)
-                category_matched = True
-                break
+        if category in tags:
+            score += rules['weight']
+            matched_categories.append(category)
     
     if 'sec' in title and 'CRITICAL' not in matched_categories and 'HIGH' not in matched_categories:
         score += 50
         matched_categories.append('HIGH')
     
-    if 'bitcoin' in title or re.search(r'\bbtc\b', title):
+    if 'bitcoin' in title or BTC_PATTERN.search(title):
         score *= 1.3
     
-    if re.search(r'\$\s*[\d,]+\.?\d*\s*[mbk]?|\$\s*[\d,]+|\d+\.?\d*%', title, re.IGNORECASE):
+    if norm.figures:
         score *= 1.2
     
     score *= news_item['source_weight']
@@ -229,58 +571,131 @@ def calculate_importance(news_item):
     return round(score), matched_categories
 
 
+def dedup_sort_key(news_item):
+    """Порядок выбора лучшей новости в кластере: SOURCE_PRIORITY, затем score"""
+    return (SOURCE_PRIORITY.get(news_item['source'], len(SOURCE_PRIORITY) + 1), -news_item['score'])
+
+
+@timed('deduplicate_news')
 def deduplicate_news(news_list):
-    """Удаляем дубликаты по similarity"""
+    """Удаляем дубликаты: из кластера похожих заголовков остается лучшая новость"""
     if not news_list:
         return []
     
-    sorted_news = sorted(news_list, key=lambda x: (x['source_priority'], -x['score']))
+    clusters = cluster_news(news_list, BATCH_SIMILARITY_THRESHOLD, dedup_sort_key)
     
-    unique_news = []
-    for item in sorted_news:
-        is_dup = False
-        for unique_item in unique_news:
-            similarity = calculate_similarity(item['title'], unique_item['title'])
-            if similarity >= 0.3:
-                is_dup = True
-                break
-        
-        if not is_dup:
-            unique_news.append(item)
+    for cluster in clusters:
+        if len(cluster) > 1:
+            dropped = ', '.join(item['source'] for item in cluster[1:])
+            print(f"  ⚠ Similar in batch: kept [{cluster[0]['source']}] {cluster[0]['title'][:50]}... (dropped: {dropped})")
     
-    return unique_news
+    return [cluster[0] for cluster in clusters]
 
 
-def process_image_for_telegram(image_url, source):
-    """Обрабатываем картинку: обрезаем watermark для CoinDesk"""
+def _image_cache_path(image_url, crop_pixels):
+    """Файл в кэше обрезанных картинок по хэшу URL, обрезки и IMAGE_MAX_DIMENSION"""
+    key = f"{image_url}\n{crop_pixels}\n{IMAGE_MAX_DIMENSION}"
+    return os.path.join(IMAGE_CACHE_DIR, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.jpg')
+
+
+def _evict_image_cache():
+    """Оставляем в кэше IMAGE_CACHE_MAX_FILES самых недавно использованных файлов"""
+    try:
+        paths = [os.path.join(IMAGE_CACHE_DIR, name) for name in os.listdir(IMAGE_CACHE_DIR)]
+    except FileNotFoundError:
+        return
+    
+    if len(paths) <= IMAGE_CACHE_MAX_FILES:
+        return
     
-    if source.lower() != 'coindesk':
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[IMAGE_CACHE_MAX_FILES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_image(image_url, max_bytes=IMAGE_MAX_DOWNLOAD_BYTES):
+    """Качаем картинку потоком; None если ошибка или больше max_bytes"""
+    response = http_request('GET', image_url, stream=True)
+    try:
+        if response.status_code != 200:
+            return None
+        
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            return None
+        
+        data = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            data.extend(chunk)
+            if len(data) > max_bytes:
+                return None
+        
+        return bytes(data)
+    finally:
+        response.close()
+
+
+@timed('process_image_for_telegram')
+def process_image_for_telegram(image_url, source):
+    """Обрезаем watermark (WATERMARK_CROP_PIXELS), результат - в дисковый кэш"""
+    crop_pixels = WATERMARK_CROP_PIXELS.get(source.lower())
+    if not crop_pixels:
         return image_url
     
+    cache_path = _image_cache_path(image_url, crop_pixels)
+    try:
+        with open(cache_path, 'rb') as f:
+            output = io.BytesIO(f.read())
+        os.utime(cache_path)
+        print(f"  ✓ Cropped {source} watermark (cached)")
+        return output
+    except OSError:
+        pass
+    
     try:
         from PIL import Image
         
-        response = requests.get(image_url, timeout=10)
-        if response.status_code != 200:
+        data = download_image(image_url)
+        if data is None:
             print(f"  ⚠️ Failed to download image for cropping")
             return image_url
         
-        img = Image.open(io.BytesIO(response.content))
+        img = Image.open(io.BytesIO(data))
         width, height = img.size
         
-        crop_pixels = 70
-        if height > crop_pixels:
-            img_cropped = img.crop((0, 0, width, height - crop_pixels))
-            
-            output = io.BytesIO()
-            img_cropped.save(output, format='JPEG', quality=95)
-            output.seek(0)
-            
-            print(f"  ✓ Cropped CoinDesk watermark (removed {crop_pixels}px)")
-            return output
-        else:
+        if height <= crop_pixels:
             print(f"  ⚠️ Image too small to crop")
             return image_url
+        
+        if img.format == 'JPEG' and max(width, height) > IMAGE_MAX_DIMENSION:
+            ratio = IMAGE_MAX_DIMENSION / max(width, height)
+            img.draft('RGB', (int(width * ratio), int(height * ratio)))
+        
+        scale = img.size[1] / height
+        img_cropped = img.crop((0, 0, img.size[0], img.size[1] - round(crop_pixels * scale)))
+        img_cropped.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION))
+        if img_cropped.mode not in ('RGB', 'L'):
+            img_cropped = img_cropped.convert('RGB')
+        
+        output = io.BytesIO()
+        img_cropped.save(output, format='JPEG', quality=95)
+        
+        try:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(output.getvalue())
+            os.replace(tmp_path, cache_path)
+            _evict_image_cache()
+        except OSError as e:
+            print(f"  ⚠️ Image cache write failed: {e}")
+        
+        output.seek(0)
+        print(f"  ✓ Cropped {source} watermark (removed {crop_pixels}px)")
+        return output
             
     except ImportError:
         print(f"  ⚠️ Pillow not installed - skipping watermark removal")
@@ -290,20 +705,103 @@ def process_image_for_telegram(image_url, source):
         return image_url
 
 
-def get_alpha_take(news_item):
-    """Получаем Alpha Take от OpenAI для новости"""
-    
-    if not OPENAI_AVAILABLE:
-        return None
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """Общий OpenAI клиент на процесс (один пул соединений и TLS handshake)"""
+    global _openai_client
     
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         print("  ⚠️ OPENAI_API_KEY not found - skipping Alpha Take")
         return None
     
-    try:
-        client = OpenAI(api_key=api_key)
+    with _openai_client_lock:
+        if _openai_client is None:
+            try:
+                from openai import OpenAI
+            except ImportError:
+                print("⚠️ OpenAI not available - Alpha Take will be skipped")
+                return None
+            _openai_client = OpenAI(api_key=api_key)
+        return _openai_client
+
+
+# Меняй при любом изменении промпта - старые ответы в кэше станут невалидны
+ALPHA_PROMPT_VERSION = 1
+
+
+class AlphaTakeCache:
+    """Кэш ответов Alpha Take по хэшу нормализованных title + summary и ALPHA_PROMPT_VERSION"""
+    
+    def __init__(self, path=ALPHA_CACHE_FILE, ttl_hours=ALPHA_CACHE_TTL_HOURS, max_entries=ALPHA_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = load_json_state(path, {})
+        self._evict()
+    
+    @staticmethod
+    def make_key(news_item):
+        """Хэш нормализованных title и summary + версия промпта"""
+        title = ' '.join(sorted(normalized_title(news_item).tokens))
+        summary = ' '.join(news_item.get('summary', '').lower().split())
+        raw = f"{ALPHA_PROMPT_VERSION}\n{title}\n{summary}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, news_item):
+        """Ответ из кэша или None"""
+        key = self.make_key(news_item)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry['created'] < self.ttl:
+                entry['used'] = now
+                self.hits += 1
+                return dict(entry['data'])
+            self.misses += 1
+            return None
+    
+    def put(self, news_item, alpha_take_data):
+        """Кладем распарсенный ответ (alpha_take / context / hashtags)"""
+        now = time.time()
+        with self._lock:
+            self._entries[self.make_key(news_item)] = {
+                'created': now,
+                'used': now,
+                'data': alpha_take_data
+            }
+            self._evict()
+    
+    def _evict(self):
+        cutoff = time.time() - self.ttl
+        self._entries = {key: entry for key, entry in self._entries.items() if entry.get('created', 0) >= cutoff}
         
+        if len(self._entries) > self.max_entries:
+            by_usage = sorted(self._entries, key=lambda key: self._entries[key].get('used', 0), reverse=True)
+            self._entries = {key: self._entries[key] for key in by_usage[:self.max_entries]}
+    
+    def save(self):
+        with self._lock:
+            save_json_state(self.path, self._entries)
+        print(f"✓ Alpha Take cache: {self.hits} hits, {self.misses} misses, {len(self._entries)} entries")
+
+
+@timed('get_alpha_take')
+def get_alpha_take(news_item, client=None):
+    """Получаем Alpha Take от OpenAI для новости"""
+    
+    if client is None:
+        client = get_openai_client()
+    if client is None:
+        return None
+    
+    try:
         score = news_item.get('score', 0)
         if score >= 80:
             impact = "HIGH"
@@ -411,6 +909,40 @@ Generate Alpha Take, Context, and Hashtags."""
         return None
 
 
+def generate_alpha_takes(news_items, cache=None):
+    """Генерируем Alpha Take для всех новостей параллельно (ALPHA_TAKE_MAX_WORKERS)"""
+    pending = []
+    for item in news_items:
+        cached = cache.get(item) if cache is not None else None
+        if cached:
+            print(f"  ✓ Alpha Take from cache: {item['title'][:50]}...")
+            item['alpha_take_data'] = cached
+        else:
+            pending.append(item)
+    
+    if not pending:
+        return
+    
+    client = get_openai_client()
+    if client is None:
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(ALPHA_TAKE_MAX_WORKERS, len(pending)))) as executor:
+        futures = {executor.submit(get_alpha_take, item, client): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                alpha_take_data = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Alpha Take failed for {item['title'][:40]}...: {e}")
+                continue
+            
+            if alpha_take_data:
+                item['alpha_take_data'] = alpha_take_data
+                if cache is not None:
+                    cache.put(item, alpha_take_data)
+
+
 def format_telegram_message(news_item):
     """Форматируем сообщение для Telegram"""
     
@@ -491,62 +1023,153 @@ def format_twitter_message(news_item):
     return tweet
 
 
+def prepare_telegram_image(news_item):
+    """Картинка для поста: URL, обработанный файл (BytesIO) или None"""
+    image = news_item.get('image_url')
+    if image and isinstance(image, str) and image.strip():
+        return process_image_for_telegram(image, news_item['source'])
+    return None
+
+
+def _send_telegram_item(news_item, processed_image):
+    """Один пост: sendPhoto с подписью или sendMessage без картинки"""
+    message = format_telegram_message(news_item)
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
+    
+    is_file = isinstance(processed_image, io.BytesIO)
+    
+    if processed_image:
+        if is_file:
+            files = {'photo': ('image.jpg', processed_image, 'image/jpeg')}
+            data = {
+                'chat_id': TELEGRAM_CHANNEL_ID,
+                'caption': message,
+                'parse_mode': 'HTML'
+            }
+            response = http_request('POST', url, data=data, files=files)
+        else:
+            payload = {
+                'chat_id': TELEGRAM_CHANNEL_ID,
+                'photo': processed_image,
+                'caption': message,
+                'parse_mode': 'HTML'
+            }
+            response = http_request('POST', url, json=payload)
+    else:
+        url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        payload = {
+            'chat_id': TELEGRAM_CHANNEL_ID,
+            'text': message,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': False
+        }
+        response = http_request('POST', url, json=payload)
+    
+    if response.status_code == 200:
+        print(f"✓ Published: {news_item['title'][:60]}...")
+        return True
+    else:
+        print(f"✗ Telegram error: {response.status_code}")
+        return False
+
+
+@timed('publish_to_telegram')
 def publish_to_telegram(news_item):
     """Публикуем в Telegram"""
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHANNEL_ID:
         return False
     
     try:
-        message = format_telegram_message(news_item)
-        image = news_item.get('image_url')
-        
-        processed_image = None
-        if image and isinstance(image, str) and image.strip():
-            processed_image = process_image_for_telegram(image, news_item['source'])
-        
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
-        
-        is_file = isinstance(processed_image, io.BytesIO)
-        
-        if processed_image:
-            if is_file:
-                files = {'photo': ('image.jpg', processed_image, 'image/jpeg')}
-                data = {
-                    'chat_id': TELEGRAM_CHANNEL_ID,
-                    'caption': message,
-                    'parse_mode': 'HTML'
-                }
-                response = requests.post(url, data=data, files=files)
-            else:
-                payload = {
-                    'chat_id': TELEGRAM_CHANNEL_ID,
-                    'photo': processed_image,
-                    'caption': message,
-                    'parse_mode': 'HTML'
-                }
-                response = requests.post(url, json=payload)
-        else:
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-            payload = {
-                'chat_id': TELEGRAM_CHANNEL_ID,
-                'text': message,
-                'parse_mode': 'HTML',
-                'disable_web_page_preview': False
-            }
-            response = requests.post(url, json=payload)
-        
-        if response.status_code == 200:
-            print(f"✓ Published: {news_item['title'][:60]}...")
-            return True
-        else:
-            print(f"✗ Telegram error: {response.status_code}")
-            return False
-            
+        return _send_telegram_item(news_item, prepare_telegram_image(news_item))
     except Exception as e:
         print(f"✗ Telegram error: {e}")
         return False
 
 
+TELEGRAM_MEDIA_GROUP_LIMIT = 10
+
+
+def _send_telegram_media_group(group):
+    """Альбом из 2-10 новостей [(news_item, image)], подпись у каждой фотографии"""
+    media = []
+    files = {}
+    for i, (news_item, processed_image) in enumerate(group):
+        if isinstance(processed_image, io.BytesIO):
+            name = f"photo{i}"
+            files[name] = (f"{name}.jpg", processed_image, 'image/jpeg')
+            photo = f"attach://{name}"
+        else:
+            photo = processed_image
+        
+        media.append({
+            'type': 'photo',
+            'media': photo,
+            'caption': format_telegram_message(news_item),
+            'parse_mode': 'HTML'
+        })
+    
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMediaGroup"
+    if files:
+        data = {'chat_id': TELEGRAM_CHANNEL_ID, 'media': json.dumps(media, ensure_ascii=False)}
+        response = http_request('POST', url, data=data, files=files)
+    else:
+        response = http_request('POST', url, json={'chat_id': TELEGRAM_CHANNEL_ID, 'media': media})
+    
+    if response.status_code == 200:
+        print(f"✓ Published album of {len(group)} items")
+        return True
+    
+    print(f"✗ Telegram album error: {response.status_code}")
+    return False
+
+
+@timed('publish_digest_to_telegram')
+def publish_digest_to_telegram(news_items):
+    """Публикуем пачку новостей альбомами sendMediaGroup в порядке score; список True/False по новостям"""
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHANNEL_ID:
+        return [False] * len(news_items)
+    
+    prepared = [(news_item, prepare_telegram_image(news_item)) for news_item in news_items]
+    results = []
+    album = []
+    
+    def send_single(news_item, processed_image):
+        try:
+            results.append(_send_telegram_item(news_item, processed_image))
+        except Exception as e:
+            print(f"✗ Telegram error: {e}")
+            results.append(False)
+    
+    def flush_album():
+        sent = False
+        if len(album) > 1:
+            try:
+                sent = _send_telegram_media_group(album)
+            except Exception as e:
+                print(f"✗ Telegram album error: {e}")
+        
+        for news_item, processed_image in album:
+            if sent:
+                results.append(True)
+            else:
+                send_single(news_item, processed_image)
+        album.clear()
+    
+    for news_item, processed_image in prepared:
+        if not processed_image:
+            flush_album()
+            send_single(news_item, None)
+            continue
+        
+        album.append((news_item, processed_image))
+        if len(album) == TELEGRAM_MEDIA_GROUP_LIMIT:
+            flush_album()
+    
+    flush_album()
+    return results
+
+
+@timed('publish_to_twitter')
 def publish_to_twitter(news_item):
     """Публикуем в Twitter"""
     if not all([TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_TOKEN_SECRET]):
@@ -581,55 +1204,63 @@ def publish_to_twitter(news_item):
         return False
 
 
-def main():
-    print("=" * 60)
-    print("🤖 Crypto News Bot - Starting...")
-    print("=" * 60)
-    
-    all_news = fetch_all_news()
-    published = load_published_news()
-    published = cleanup_old_news(published)
-    
-    print(f"Already published (last 7 days): {len(published)}")
-    
+def process_news(all_news, published, seen=None, alpha_cache=None):
+    """Фильтруем, скорим, дедуплицируем и публикуем; возвращает (telegram_count, twitter_count)"""
     new_news = []
     for item in all_news:
         if not is_duplicate(item, published):
             new_news.append(item)
         else:
+            mark_seen(seen, item)
+            archive(item, REJECT_DUPLICATE)
             print(f"  ⚠ Already published ({'similar title' if not item.get('link') else 'link'}): {item['title'][:60]}...")
     
+    count('duplicate_check', items_in=len(all_news), items_out=len(new_news))
     print(f"New news items: {len(new_news)}")
     
     print("\n🎯 Calculating importance scores...")
     scored_news = []
-    stock_sources = ['marketwatch', 'yahoo_finance', 'reuters']
     
     for item in new_news:
         score, categories = calculate_importance(item)
         
         threshold = MIN_IMPORTANCE_SCORE
-        if item['source'] in stock_sources:
+        if item['source'] in STOCK_SOURCES:
             threshold = STOCK_MARKET_THRESHOLD
         
         if score >= threshold:
             item['score'] = score
             item['categories'] = categories
             scored_news.append(item)
+        else:
+            mark_seen(seen, item)
+            archive(item, REJECT_LOW_SCORE, score=score, categories=categories)
     
+    count('importance', items_in=len(new_news), items_out=len(scored_news))
     print(f"News above threshold: {len(scored_news)}")
     
     final_news = deduplicate_news(scored_news)
+    count('deduplicate', items_in=len(scored_news), items_out=len(final_news))
     print(f"After deduplication: {len(final_news)}")
     
+    if ARCHIVE.enabled:
+        kept = {id(item) for item in final_news}
+        for item in scored_news:
+            if id(item) not in kept:
+                archive(item, REJECT_SIMILAR)
+    
     if not final_news:
         print("💤 No important news found")
-        print("=" * 60)
-        return
+        return 0, 0
     
     final_news.sort(key=lambda x: x['score'], reverse=True)
-    top_news = final_news[:5]
-    
+    for item in final_news[5:]:
+        archive(item, REJECT_NOT_IN_TOP)
+    return publish_top_news(final_news[:5], published, seen, alpha_cache)
+
+
+def publish_top_news(top_news, published, seen=None, alpha_cache=None):
+    """Alpha Take и публикация отобранных новостей; возвращает (telegram_count, twitter_count)"""
     print(f"\n📢 Publishing top {len(top_news)} news items:")
     for i, item in enumerate(top_news, 1):
         print(f"{i}. [{item['score']}] {item['title']}")
@@ -637,32 +1268,90 @@ def main():
             print(f"   Summary: {item['summary'][:50]}...")
     
     print("\n🤖 Generating Alpha Takes with OpenAI...")
-    for item in top_news:
-        alpha_take_data = get_alpha_take(item)
-        if alpha_take_data:
-            item['alpha_take_data'] = alpha_take_data
+    generate_alpha_takes(top_news, alpha_cache)
+    count('alpha_take', items_in=len(top_news),
+          items_out=sum(1 for item in top_news if item.get('alpha_take_data')))
     
     telegram_count = 0
     twitter_count = 0
     
-    for item in top_news:
-        if publish_to_telegram(item):
+    if TELEGRAM_DIGEST_MODE:
+        telegram_results = publish_digest_to_telegram(top_news)
+    else:
+        telegram_results = [publish_to_telegram(item) for item in top_news]
+    
+    for item, sent in zip(top_news, telegram_results):
+        if sent:
             telegram_count += 1
         
-        if TWITTER_ENABLED and publish_to_twitter(item):
+        tweeted = TWITTER_ENABLED and publish_to_twitter(item)
+        if tweeted:
             twitter_count += 1
         
-        published.append({
-            'title': item['title'],
-            'link': item.get('link', ''),
-            'published_date': datetime.now().isoformat()
-        })
+        published.add(item['title'], item.get('link', ''), fingerprint=normalized_title(item).fingerprint)
+        mark_seen(seen, item)
+        archive(item, telegram=bool(sent), twitter=bool(tweeted))
     
-    save_published_news(published)
+    count('telegram', items_in=len(top_news), items_out=telegram_count)
+    if TWITTER_ENABLED:
+        count('twitter', items_in=len(top_news), items_out=twitter_count)
     
     print(f"\n✅ Published: {telegram_count} to Telegram, {twitter_count} to Twitter")
+    return telegram_count, twitter_count
+
+
+def main():
+    print("=" * 60)
+    print("🤖 Crypto News Bot - Starting...")
+    print("=" * 60)
+    
+    feed_cache = load_feed_cache()
+    seen = load_seen_entries()
+    all_news = fetch_all_news(feed_cache=feed_cache, seen=seen)
+    published = load_published_history()
+    alpha_cache = AlphaTakeCache()
+    
+    print(f"Already published (last {HISTORY_RETENTION_DAYS} days): {len(published)}")
+    
+    process_news(all_news, published, seen, alpha_cache)
+    
+    published.save()
+    save_feed_cache(feed_cache)
+    save_seen_entries(seen)
+    alpha_cache.save()
+    
+    METRICS.print_summary()
+    write_metrics()
+    ARCHIVE.flush(METRICS.summary())
+    
     print("=" * 60)
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Crypto News Bot')
+    parser.add_argument('--daemon', action='store_true',
+                        help='работать постоянно, опрашивая источники по расписанию')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='один запуск асинхронным конвейером fetch -> score -> enrich -> publish')
+    parser.add_argument('--stream', action='store_true',
+                        help='один запуск в потоковом режиме: в памяти только top-K новостей')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='время импорта news_parser и лениво загружаемых зависимостей')
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        from news_metrics import profile_startup
+        profile_startup()
+    elif args.daemon:
+        from news_daemon import run_daemon
+        run_daemon()
+    elif args.pipeline:
+        from news_pipeline import run_pipeline
+        run_pipeline()
+    elif args.stream:
+        from news_stream import run_stream
+        run_stream()
+    else:
+        main()
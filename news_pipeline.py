@@ -0,0 +1,290 @@
+"""Асинхронный конвейер: fetch -> score -> enrich -> publish
+
+python news_parser.py --pipeline
+
+Этапы связаны ограниченными очередями (backpressure) и работают
+одновременно: новость скорится, как только пришел ее feed, а публикация
+начинается сразу после ранжирования. Новости из текущего top-N со score не
+ниже PIPELINE_FAST_PUBLISH_SCORE получают Alpha Take и публикуются, не
+дожидаясь остальных источников (не больше PIPELINE_SPECULATIVE_ALPHA_TAKES
+запросов к OpenAI до конца скоринга). Alpha Take для остального top-N
+генерируется один раз, когда скоринг закончен.
+Блокирующие вызовы (requests, OpenAI, Telegram) уходят в потоки.
+"""
+
+import asyncio
+import time
+
+import news_parser as bot
+from news_metrics import count, METRICS, write_metrics
+from news_archive import ARCHIVE, archive, REJECT_DUPLICATE, REJECT_LOW_SCORE, REJECT_NOT_IN_TOP
+from news_dedup import cluster_news, jaccard, normalized_title
+from news_config import (
+    RSS_SOURCES,
+    MIN_IMPORTANCE_SCORE,
+    STOCK_MARKET_THRESHOLD,
+    BATCH_SIMILARITY_THRESHOLD,
+    TWITTER_ENABLED,
+    FETCH_MAX_WORKERS,
+    FETCH_TOTAL_TIMEOUT,
+    ALPHA_TAKE_MAX_WORKERS,
+    HISTORY_RETENTION_DAYS,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_FAST_PUBLISH_SCORE,
+    PIPELINE_SPECULATIVE_ALPHA_TAKES
+)
+
+_DONE = object()
+
+
+class NewsPipeline:
+    """Один запуск бота в виде конвейера asyncio"""
+    
+    def __init__(self, sources=None, top_n=5):
+        self.sources = sources if sources is not None else RSS_SOURCES
+        self.top_n = top_n
+        
+        self.feed_cache = bot.load_feed_cache()
+        self.seen = bot.load_seen_entries()
+        self.published = bot.load_published_history()
+        self.alpha_cache = bot.AlphaTakeCache()
+        
+        self.candidates = []
+        self.published_items = []
+        self.enrichment = {}
+        self.speculative_takes = 0
+        self.scoring_done = False
+        self.telegram_count = 0
+        self.twitter_count = 0
+        self.started = None
+        self.first_post_after = None
+    
+    # --- ранжирование ---
+    
+    def _near_published(self, news_item):
+        """Похожа на уже опубликованную в этом запуске новость"""
+        tokens = normalized_title(news_item).tokens
+        return any(
+            jaccard(tokens, normalized_title(item).tokens) >= BATCH_SIMILARITY_THRESHOLD
+            for item in self.published_items
+        )
+    
+    def current_top(self):
+        """Текущий top-N среди кандидатов (без опубликованного и похожих на него)"""
+        slots = self.top_n - len(self.published_items)
+        if slots <= 0:
+            return []
+        
+        pool = [item for item in self.candidates if not any(item is done for done in self.published_items)]
+        leaders = [cluster[0] for cluster in cluster_news(pool, BATCH_SIMILARITY_THRESHOLD, bot.dedup_sort_key)]
+        leaders = [item for item in leaders if not self._near_published(item)]
+        leaders.sort(key=lambda x: x['score'], reverse=True)
+        return leaders[:slots]
+    
+    async def request_enrichment(self, news_item):
+        """Ставим новость в очередь на Alpha Take (один раз)"""
+        if id(news_item) in self.enrichment:
+            return
+        self.enrichment[id(news_item)] = asyncio.Event()
+        await self.enrich_queue.put(news_item)
+    
+    def is_enriched(self, news_item):
+        event = self.enrichment.get(id(news_item))
+        return event is not None and event.is_set()
+    
+    # --- этапы ---
+    
+    async def fetch_source(self, source_name, feed_config, deadline, semaphore):
+        async with semaphore:
+            started = time.monotonic()
+            validators = {}
+            try:
+                news = await asyncio.wait_for(
+                    asyncio.to_thread(bot.fetch_rss_feed, source_name, feed_config, deadline,
+                                      self.feed_cache, self.seen, validators),
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                print(f"✗ {source_name}: Timed out after {FETCH_TOTAL_TIMEOUT}s")
+                return
+            latency = time.monotonic() - started
+        
+        if news:
+            print(f"✓ Parsed {source_name}: {len(news)} entries ({latency:.2f}s)")
+        elif news is not None:
+            print(f"= {source_name}: No new entries ({latency:.2f}s)")
+        else:
+            print(f"✗ {source_name}: Invalid RSS feed ({latency:.2f}s)")
+        
+        for item in news or []:
+            await self.score_queue.put(item)
+        
+        # Поток источника, не успевшего к дедлайну, пишет только в свой validators
+        if validators:
+            self.feed_cache[source_name] = validators
+    
+    async def fetch_stage(self):
+        semaphore = asyncio.Semaphore(FETCH_MAX_WORKERS)
+        deadline = time.monotonic() + FETCH_TOTAL_TIMEOUT
+        await asyncio.gather(*(
+            self.fetch_source(source_name, feed_config, deadline, semaphore)
+            for source_name, feed_config in self.sources.items()
+        ))
+        await self.score_queue.put(_DONE)
+    
+    async def score_stage(self):
+        while True:
+            item = await self.score_queue.get()
+            if item is _DONE:
+                break
+            
+            if bot.is_duplicate(item, self.published):
+                count('duplicate_check', items_in=1)
+                bot.mark_seen(self.seen, item)
+                archive(item, REJECT_DUPLICATE)
+                continue
+            count('duplicate_check', items_in=1, items_out=1)
+            
+            score, categories = bot.calculate_importance(item)
+            threshold = STOCK_MARKET_THRESHOLD if item['source'] in bot.STOCK_SOURCES else MIN_IMPORTANCE_SCORE
+            if score < threshold:
+                count('importance', items_in=1)
+                bot.mark_seen(self.seen, item)
+                archive(item, REJECT_LOW_SCORE, score=score, categories=categories)
+                continue
+            count('importance', items_in=1, items_out=1)
+            
+            item['score'] = score
+            item['categories'] = categories
+            self.candidates.append(item)
+            
+            for top_item in self.current_top():
+                if (top_item['score'] >= PIPELINE_FAST_PUBLISH_SCORE and id(top_item) not in self.enrichment
+                        and self.speculative_takes < PIPELINE_SPECULATIVE_ALPHA_TAKES):
+                    self.speculative_takes += 1
+                    await self.request_enrichment(top_item)
+            self.changed.set()
+        
+        self.scoring_done = True
+        print(f"News above threshold: {len(self.candidates)}")
+        for top_item in self.current_top():
+            await self.request_enrichment(top_item)
+        self.changed.set()
+    
+    async def enrich_worker(self, client):
+        while True:
+            item = await self.enrich_queue.get()
+            if item is _DONE:
+                break
+            
+            try:
+                alpha_take_data = self.alpha_cache.get(item)
+                if alpha_take_data is None and client is not None:
+                    alpha_take_data = await asyncio.to_thread(bot.get_alpha_take, item, client)
+                    if alpha_take_data:
+                        self.alpha_cache.put(item, alpha_take_data)
+                if alpha_take_data:
+                    item['alpha_take_data'] = alpha_take_data
+                count('alpha_take', items_in=1, items_out=1 if alpha_take_data else 0)
+            except Exception as e:
+                print(f"  ⚠️ Alpha Take failed for {item['title'][:40]}...: {e}")
+            finally:
+                self.enrichment[id(item)].set()
+                self.changed.set()
+    
+    def _next_to_publish(self):
+        """Новость, которую можно публиковать сейчас, или None"""
+        top = self.current_top()
+        if self.scoring_done:
+            return top[0] if top else None
+        
+        for item in top:
+            if item['score'] >= PIPELINE_FAST_PUBLISH_SCORE and self.is_enriched(item):
+                return item
+        return None
+    
+    async def publish_stage(self):
+        while len(self.published_items) < self.top_n:
+            item = self._next_to_publish()
+            if item is None:
+                if self.scoring_done:
+                    break
+                self.changed.clear()
+                await self.changed.wait()
+                continue
+            
+            await self.request_enrichment(item)
+            await self.enrichment[id(item)].wait()
+            
+            if self.first_post_after is None:
+                self.first_post_after = time.monotonic() - self.started
+            
+            print(f"\n📢 [{item['score']}] {item['title']}")
+            self.published_items.append(item)
+            
+            sent = await asyncio.to_thread(bot.publish_to_telegram, item)
+            count('telegram', items_in=1, items_out=1 if sent else 0)
+            if sent:
+                self.telegram_count += 1
+            tweeted = False
+            if TWITTER_ENABLED:
+                tweeted = await asyncio.to_thread(bot.publish_to_twitter, item)
+                count('twitter', items_in=1, items_out=1 if tweeted else 0)
+                if tweeted:
+                    self.twitter_count += 1
+            
+            self.published.add(item['title'], item.get('link', ''), fingerprint=normalized_title(item).fingerprint)
+            bot.mark_seen(self.seen, item)
+            archive(item, telegram=bool(sent), twitter=bool(tweeted))
+    
+    async def run(self):
+        self.started = time.monotonic()
+        self.score_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.enrich_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.changed = asyncio.Event()
+        
+        print(f"Already published (last {HISTORY_RETENTION_DAYS} days): {len(self.published)}")
+        print("\n📡 Fetching, scoring and enriching concurrently...")
+        
+        client = bot.get_openai_client()
+        workers = [asyncio.create_task(self.enrich_worker(client)) for _ in range(ALPHA_TAKE_MAX_WORKERS)]
+        
+        try:
+            await asyncio.gather(self.fetch_stage(), self.score_stage(), self.publish_stage())
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        for item in self.candidates:
+            if not any(item is done for done in self.published_items):
+                archive(item, REJECT_NOT_IN_TOP)
+        
+        if not self.published_items:
+            print("💤 No important news found")
+        else:
+            print(f"\n✅ Published: {self.telegram_count} to Telegram, {self.twitter_count} to Twitter")
+            print(f"⏱ First post after {self.first_post_after:.2f}s")
+        print(f"⏱ Pipeline finished in {time.monotonic() - self.started:.2f}s")
+    
+    def save(self):
+        self.published.save()
+        bot.save_feed_cache(self.feed_cache)
+        bot.save_seen_entries(self.seen)
+        self.alpha_cache.save()
+        
+        METRICS.print_summary()
+        write_metrics()
+        ARCHIVE.flush(METRICS.summary())
+
+
+def run_pipeline(sources=None, top_n=5):
+    print("=" * 60)
+    print("🤖 Crypto News Bot - Starting (pipeline)...")
+    print("=" * 60)
+    
+    pipeline = NewsPipeline(sources, top_n)
+    asyncio.run(pipeline.run())
+    pipeline.save()
+    
+    print("=" * 60)
@@ -0,0 +1,250 @@
+"""Потоковый режим: python news_parser.py --stream
+
+Для больших партий (агрегаторы с тысячами записей): вместо списков
+all_news / new_news / scored_news каждая запись проверяется и скорится сразу
+после разбора, в памяти остается только top-K лучших новостей и индекс
+истории. Источники качаются и разбираются в потоках, записи идут через
+ограниченную очередь (STREAM_QUEUE_SIZE) - пиковая память не растет с
+размером feeds. Записи - NewsRecord со __slots__, в dict превращаются только
+попавшие в top-K.
+
+Дедупликация внутри партии идет по top-K: похожая на уже отобранную новость
+заменяет ее, только если лучше по dedup_sort_key.
+"""
+
+import heapq
+import itertools
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import news_parser as bot
+from news_dedup import jaccard, normalized_title
+from news_metrics import count, METRICS, write_metrics
+from news_archive import ARCHIVE, archive, REJECT_DUPLICATE, REJECT_LOW_SCORE, REJECT_SIMILAR, REJECT_NOT_IN_TOP
+from news_config import (
+    RSS_SOURCES,
+    MIN_IMPORTANCE_SCORE,
+    STOCK_MARKET_THRESHOLD,
+    BATCH_SIMILARITY_THRESHOLD,
+    FETCH_MAX_WORKERS,
+    FETCH_TOTAL_TIMEOUT,
+    HISTORY_RETENTION_DAYS,
+    STREAM_QUEUE_SIZE
+)
+
+_DONE = object()
+
+
+class NewsRecord:
+    """Новость в потоковом режиме: __slots__ вместо dict
+    
+    item['title'], item.get('link') и item['score'] = ... работают как у dict,
+    поэтому is_duplicate, calculate_importance и mark_seen принимают запись
+    как есть.
+    """
+    
+    __slots__ = ('title', 'link', 'summary', 'published_date', 'source', 'source_weight',
+                 'source_priority', 'image_url', 'entry_key', 'norm', 'score', 'categories')
+    
+    def __init__(self, title, link, summary, published_date, source, source_weight,
+                 source_priority, image_url, entry_key, norm=None):
+        self.title = title
+        self.link = link
+        self.summary = summary
+        self.published_date = published_date
+        self.source = source
+        self.source_weight = source_weight
+        self.source_priority = source_priority
+        self.image_url = image_url
+        self.entry_key = entry_key
+        self.norm = norm
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+    
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+
+def stream_news(sources=None, feed_cache=None, seen=None):
+    """Записи всех источников по одной (генератор)
+    
+    Источники разбираются в FETCH_MAX_WORKERS потоках, поток ждет, пока
+    очередь освободится. Источники, не успевшие к FETCH_TOTAL_TIMEOUT,
+    обрываются. validators источника попадают в feed_cache, только когда
+    все его записи отданы потребителю.
+    """
+    if sources is None:
+        sources = RSS_SOURCES
+    
+    records = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    stopped = False
+    deadline = time.monotonic() + FETCH_TOTAL_TIMEOUT
+    
+    def put(record):
+        while not stopped:
+            try:
+                records.put(record, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def worker(source_name, feed_config):
+        started = time.monotonic()
+        entries = 0
+        validators = {}
+        try:
+            for record in bot.iter_rss_feed(source_name, feed_config, deadline, feed_cache, seen,
+                                            make_item=NewsRecord, validators=validators):
+                if not put(record):
+                    return
+                entries += 1
+            if entries:
+                print(f"✓ Parsed {source_name}: {entries} entries ({time.monotonic() - started:.2f}s)")
+            else:
+                print(f"= {source_name}: No new entries ({time.monotonic() - started:.2f}s)")
+        except Exception as e:
+            print(f"✗ {source_name}: {e} ({time.monotonic() - started:.2f}s)")
+        finally:
+            put((_DONE, source_name, validators))
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, min(FETCH_MAX_WORKERS, len(sources))))
+    for source_name, feed_config in sources.items():
+        executor.submit(worker, source_name, feed_config)
+    
+    try:
+        remaining = len(sources)
+        while remaining:
+            try:
+                record = records.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                print(f"✗ Fetch stage timed out after {FETCH_TOTAL_TIMEOUT}s")
+                return
+            if isinstance(record, tuple) and record[0] is _DONE:
+                _, source_name, validators = record
+                if feed_cache is not None and validators:
+                    feed_cache[source_name] = validators
+                remaining -= 1
+                continue
+            yield record
+    finally:
+        stopped = True
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TopK:
+    """K лучших по score новостей с дедупликацией внутри отобранных"""
+    
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._order = itertools.count()
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def offer(self, record):
+        """Предлагаем запись
+        
+        Возвращает (выбывшая запись, причина) - сама record или вытесненная
+        ею - или (None, None), если top-K просто пополнился.
+        """
+        tokens = normalized_title(record).tokens
+        
+        for index, (_, _, kept, kept_tokens) in enumerate(self._heap):
+            if jaccard(tokens, kept_tokens) >= BATCH_SIMILARITY_THRESHOLD:
+                if bot.dedup_sort_key(record) >= bot.dedup_sort_key(kept):
+                    return record, REJECT_SIMILAR
+                self._heap[index] = (record['score'], next(self._order), record, tokens)
+                heapq.heapify(self._heap)
+                return kept, REJECT_SIMILAR
+        
+        entry = (record['score'], next(self._order), record, tokens)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return None, None
+        if entry[0] > self._heap[0][0]:
+            return heapq.heapreplace(self._heap, entry)[2], REJECT_NOT_IN_TOP
+        return record, REJECT_NOT_IN_TOP
+    
+    def items(self):
+        """Отобранные новости dict'ами, лучшие первыми"""
+        ordered = sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))
+        return [record.to_dict() for _, _, record, _ in ordered]
+
+
+def select_top_news(records, published, seen=None, top_k=5):
+    """Проверка истории, скоринг и отбор top-K по мере поступления записей"""
+    top = TopK(top_k)
+    total = 0
+    
+    for record in records:
+        total += 1
+        
+        if bot.is_duplicate(record, published):
+            count('duplicate_check', items_in=1)
+            bot.mark_seen(seen, record)
+            archive(record, REJECT_DUPLICATE)
+            continue
+        count('duplicate_check', items_in=1, items_out=1)
+        
+        score, categories = bot.calculate_importance(record)
+        threshold = STOCK_MARKET_THRESHOLD if record['source'] in bot.STOCK_SOURCES else MIN_IMPORTANCE_SCORE
+        if score < threshold:
+            count('importance', items_in=1)
+            bot.mark_seen(seen, record)
+            archive(record, REJECT_LOW_SCORE, score=score, categories=categories)
+            continue
+        count('importance', items_in=1, items_out=1)
+        
+        record['score'] = score
+        record['categories'] = categories
+        dropped, reason = top.offer(record)
+        if dropped is not None:
+            archive(dropped, reason)
+    
+    print(f"Streamed {total} news items, kept top {len(top)}")
+    return top.items()
+
+
+def run_stream(sources=None, top_k=5):
+    print("=" * 60)
+    print("🤖 Crypto News Bot - Starting (streaming)...")
+    print("=" * 60)
+    
+    feed_cache = bot.load_feed_cache()
+    seen = bot.load_seen_entries()
+    published = bot.load_published_history()
+    alpha_cache = bot.AlphaTakeCache()
+    
+    print(f"Already published (last {HISTORY_RETENTION_DAYS} days): {len(published)}")
+    print("\n📡 Streaming news from sources...")
+    
+    top_news = select_top_news(stream_news(sources, feed_cache, seen), published, seen, top_k)
+    
+    if top_news:
+        bot.publish_top_news(top_news, published, seen, alpha_cache)
+    else:
+        print("💤 No important news found")
+    
+    published.save()
+    bot.save_feed_cache(feed_cache)
+    bot.save_seen_entries(seen)
+    alpha_cache.save()
+    
+    METRICS.print_summary()
+    write_metrics()
+    ARCHIVE.flush(METRICS.summary())
+    
+    print("=" * 60)
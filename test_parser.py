@@ -103,6 +103,639 @@ def test_all_sources():
             print(f"✗ {source_name:15s} - Error: {e}")
 
 
+def test_duplicate_index():
+    """Индекс дубликатов дает тот же результат, что и полный перебор"""
+    print("\n\n🔁 Testing duplicate index...\n")
+    
+    from news_parser import calculate_similarity
+    from news_dedup import DuplicateIndex
+    from news_history import JsonlHistory
+    
+    published = JsonlHistory('published_news.jsonl', retention_days=None).load().records
+    
+    index = DuplicateIndex(published)
+    
+    candidates = [item['title'] for item in published[:50]] + [
+        "SEC Approves Bitcoin ETF Applications from BlackRock",
+        "Bitcoin Surges 15% After Fed Rate Cut Decision",
+        "!!! ???",
+        ""
+    ]
+    
+    for title in candidates:
+        expected = any(
+            calculate_similarity(title, pub['title']) >= 0.5
+            for pub in published if title
+        )
+        assert bool(index.similar_titles(title)) == expected, title
+    
+    print(f"✓ {len(candidates)} candidates match brute force against {len(published)} published")
+
+
+def test_title_fingerprints():
+    """Отпечатки заголовков дают тот же Jaccard, что и токены"""
+    print("\n\n🔑 Testing title fingerprints...\n")
+    
+    from news_dedup import (DuplicateIndex, title_fingerprint, encode_fingerprint, decode_fingerprint,
+                            tokenize_title, jaccard)
+    from news_history import JsonlHistory
+    
+    records = JsonlHistory('published_news.jsonl', retention_days=None).load().records
+    plain = [{'title': record['title'], 'link': record['link']} for record in records]
+    
+    for record in records[:20]:
+        fingerprint = title_fingerprint(record['title'])
+        assert decode_fingerprint(encode_fingerprint(fingerprint)) == fingerprint
+        assert len(fingerprint) == len(tokenize_title(record['title']))
+    
+    with_fp = DuplicateIndex(records, threshold=0.3)
+    without_fp = DuplicateIndex(plain, threshold=0.3)
+    for record in plain:
+        expected = sorted(
+            (other['title'], jaccard(tokenize_title(record['title']), tokenize_title(other['title'])))
+            for other in plain
+            if jaccard(tokenize_title(record['title']), tokenize_title(other['title'])) >= 0.3
+        )
+        assert sorted(with_fp.similar_titles(record['title'])) == expected
+        assert sorted(without_fp.similar_titles(record['title'])) == expected
+    
+    print(f"✓ Fingerprints match token Jaccard on {len(records)} records")
+
+
+def test_sqlite_history():
+    """SQLite история находит те же дубликаты, что и JSONL индекс"""
+    print("\n\n🗄  Testing SQLite history...\n")
+    
+    import os
+    import tempfile
+    from news_history import JsonlHistory, SQLiteHistory, migrate_to_sqlite
+    
+    jsonl = JsonlHistory('published_news.jsonl', retention_days=None).load()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'published_news.db')
+        migrate_to_sqlite('published_news.jsonl', db_path)
+        sqlite = SQLiteHistory(db_path, retention_days=None).load()
+        
+        try:
+            assert len(sqlite) == len(jsonl)
+            for record in jsonl.records[:30]:
+                assert sorted(sqlite.similar_titles(record['title'])) == sorted(jsonl.similar_titles(record['title']))
+                assert sqlite.has_link(record['link']) == jsonl.has_link(record['link'])
+            assert not sqlite.is_duplicate({'title': 'Completely unrelated headline', 'link': 'https://example.com/x'})
+        finally:
+            sqlite.close()
+    
+    print(f"✓ SQLite matches JSONL on {len(jsonl)} records")
+
+
+def test_fast_rss_parser():
+    """Быстрый RSS 2.0 парсер дает те же поля, что feedparser, на фикстурах feeds"""
+    print("\n\n⚡ Testing fast RSS parser...\n")
+    
+    import calendar
+    import glob
+    import html as html_module
+    from news_rss import parse_rss2, FastParserError
+    
+    def plain(text):
+        return html_module.unescape(re.sub('<.*?>', '', text or '')).strip()
+    
+    def image(entry):
+        if entry.get('media_content'):
+            return entry['media_content'][0].get('url')
+        if entry.get('enclosures'):
+            return entry['enclosures'][0].get('href')
+        return None
+    
+    for path in sorted(glob.glob('bench_fixtures/*.xml')):
+        with open(path, 'rb') as f:
+            body = f.read()
+        
+        expected = feedparser.parse(body).entries
+        entries = parse_rss2(body)
+        assert len(entries) == len(expected), path
+        
+        for fast, slow in zip(entries, expected):
+            for key in ('title', 'link', 'id'):
+                assert fast.get(key, '').strip() == slow.get(key, '').strip(), (path, key)
+            assert tuple(fast['published_parsed'][:6]) == tuple(slow.published_parsed[:6])
+            assert plain(fast.get('summary')) == plain(slow.get('summary'))
+            assert image(fast) == image(slow)
+        
+        newest = calendar.timegm(entries[0]['published_parsed'])
+        assert parse_rss2(body, cutoff=newest)[0] == entries[0]
+        assert parse_rss2(body, cutoff=newest + 1) == []
+        
+        print(f"✓ {path}: {len(entries)} entries match feedparser")
+    
+    content = 'xmlns:content="http://purl.org/rss/1.0/modules/content/"'
+    for item in ('<content:encoded><![CDATA[<p>Body &amp; more</p>]]></content:encoded>',
+                 '<content:encoded>Body</content:encoded><description>Short</description>',
+                 '<description></description><content:encoded>Body</content:encoded>'):
+        body = (f'<?xml version="1.0"?><rss version="2.0" {content}><channel><title>t</title>'
+                f'<item><title>x</title>{item}</item></channel></rss>').encode()
+        assert parse_rss2(body)[0].get('summary') == feedparser.parse(body).entries[0].get('summary'), item
+    print("✓ content:encoded fills summary when there is no description")
+    
+    atom = b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><entry><title>x</title></entry></feed>'
+    for body in (atom, b'<rss version="2.0"><channel><item><title>broken'):
+        try:
+            parse_rss2(body)
+        except FastParserError:
+            continue
+        raise AssertionError("expected FastParserError")
+    print("✓ Atom and broken XML fall back to feedparser")
+    
+    import hashlib
+    import news_parser
+    
+    items = ''.join(
+        f"<item><title>Headline {i}{' & more' if i == 5 else ''}</title>"
+        f"<link>https://example.com/{i}</link><guid>https://example.com/{i}</guid></item>"
+        for i in range(11)
+    )
+    body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{items}</channel></rss>'.encode()
+    feed_config = {'url': 'https://example.com/feed.xml', 'priority': 1, 'weight_multiplier': 1.0, 'fast_parser': True}
+    
+    entries = list(news_parser.iter_feed_entries('broken', feed_config, body, {}))
+    assert [entry['link'] for entry in entries] == [entry.link for entry in feedparser.parse(body).entries]
+    assert len(entries) == 11
+    
+    download_feed = news_parser.download_feed
+    news_parser.download_feed = lambda url, deadline=None, validators=None: (body, {})
+    try:
+        validators = {}
+        assert len(news_parser.fetch_rss_feed('broken', feed_config, validators=validators)) == 11
+        assert validators['digest'] == hashlib.sha256(body).hexdigest()
+    finally:
+        news_parser.download_feed = download_feed
+    print("✓ XML error mid-feed: feedparser picks up the rest of the entries")
+
+
+def test_stream_top_k():
+    """Потоковый отбор: лучшие по score, без похожих между собой, записи со __slots__"""
+    print("\n\n🌊 Testing streaming top-K...\n")
+    
+    from news_parser import calculate_importance
+    from news_dedup import DuplicateIndex, tokenize_title, jaccard
+    from news_history import JsonlHistory
+    from news_stream import NewsRecord, select_top_news
+    from news_config import BATCH_SIMILARITY_THRESHOLD
+    
+    records = [
+        NewsRecord(title=record['title'], link=record['link'], summary='', published_date=datetime.now(),
+                   source='coindesk', source_weight=1.0, source_priority=1, image_url=None, entry_key=None)
+        for record in JsonlHistory('published_news.jsonl', retention_days=None).load().records
+    ]
+    assert records[0]['title'] == records[0].title and records[0].get('score') is None
+    assert not hasattr(records[0], '__dict__')
+    
+    scores = [calculate_importance(record)[0] for record in records]
+    passed = [score for score in scores if score >= MIN_IMPORTANCE_SCORE]
+    
+    top = select_top_news(iter(records), DuplicateIndex([]), top_k=5)
+    assert len(top) == min(5, len(passed))
+    assert top[0]['score'] == max(passed)
+    assert [item['score'] for item in top] == sorted((item['score'] for item in top), reverse=True)
+    for i, item in enumerate(top):
+        assert isinstance(item, dict)
+        for other in top[i + 1:]:
+            assert jaccard(tokenize_title(item['title']), tokenize_title(other['title'])) < BATCH_SIMILARITY_THRESHOLD
+    
+    print(f"✓ Top {len(top)} of {len(records)} streamed records, best score {top[0]['score'] if top else '-'}")
+
+
+def test_score_batch():
+    """score_batch совпадает с calculate_importance (numpy и чистый Python)"""
+    print("\n\n🧮 Testing batch scoring...\n")
+    
+    import glob
+    import news_backtest
+    from news_parser import calculate_importance
+    from news_history import JsonlHistory
+    from news_rss import parse_rss2
+    
+    titles = [record['title'] for record in JsonlHistory('published_news.jsonl', retention_days=None).load().records]
+    for path in sorted(glob.glob('bench_fixtures/*.xml')):
+        with open(path, 'rb') as f:
+            titles += [entry['title'] for entry in parse_rss2(f.read())]
+    titles += ["SEC sues exchange over $1B Bitcoin fraud", "BTC price prediction sponsored", "Nothing here"]
+    sources = [list(RSS_SOURCES)[i % len(RSS_SOURCES)] for i in range(len(titles))]
+    
+    expected = [
+        calculate_importance({'title': title, 'source_weight': RSS_SOURCES[source]['weight_multiplier']})
+        for title, source in zip(titles, sources)
+    ]
+    
+    numpy_module = news_backtest.np
+    try:
+        for np_module in ([numpy_module, None] if numpy_module is not None else [None]):
+            news_backtest.np = np_module
+            matrix = news_backtest.TitleMatrix(titles)
+            assert list(news_backtest.score_batch(titles, sources, matrix=matrix)) == [score for score, _ in expected]
+            assert [matrix.categories(row) for row in range(len(titles))] == [categories for _, categories in expected]
+    finally:
+        news_backtest.np = numpy_module
+    
+    print(f"✓ {len(titles)} titles score the same as calculate_importance")
+
+
+def test_archive():
+    """Архив: дозапись запусков, фильтр contains, пропуск оборванной записи"""
+    print("\n\n🗄  Testing news archive...\n")
+    
+    import os
+    import tempfile
+    from news_archive import Archive, iter_archive, archive_days, ITEMS_FILE, RUNS_FILE, REJECT_LOW_SCORE
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = Archive(tmp, enabled=True)
+        for run in range(2):
+            for i in range(50):
+                item = {'title': f"Run {run} headline {i}", 'link': f"https://example.com/{run}/{i}",
+                        'source': 'coindesk', 'published_date': datetime(2026, 1, 1, 12, 0)}
+                if i % 10:
+                    sink.add(item, REJECT_LOW_SCORE, score=i, categories=[])
+                else:
+                    sink.add(item, telegram=True, twitter=False)
+            sink.flush({'timings': {}, 'stages': {}})
+        
+        records = list(iter_archive(tmp))
+        assert len(records) == 100
+        assert records[0]['published_date'] == '2026-01-01T12:00:00' and records[0]['telegram'] is True
+        assert records[1]['reject'] == REJECT_LOW_SCORE and records[1]['score'] == 1
+        assert len(list(iter_archive(tmp, contains='"published":true'))) == 10
+        assert len(list(iter_archive(tmp, filename=RUNS_FILE))) == 2
+        
+        day = archive_days(tmp)[0]
+        assert list(iter_archive(tmp, since='2000-01-01', until='2000-01-02')) == []
+        
+        with open(os.path.join(tmp, day, ITEMS_FILE), 'ab') as f:
+            f.write(b'\x1f\x8b\x08\x00')
+        assert len(list(iter_archive(tmp))) == 100
+    
+    print(f"✓ {len(records)} records in {day}, 2 gzip members")
+
+
+def test_normalized_title():
+    """NormalizedTitle совпадает с отдельной нормализацией и не попадает в историю"""
+    print("\n\n🔤 Testing normalized titles...\n")
+    
+    import os
+    import tempfile
+    from news_dedup import (NormalizedTitle, normalized_title, tokenize_title, title_fingerprint,
+                            DuplicateIndex, cluster_news, MONEY_PATTERN)
+    from news_history import JsonlHistory
+    
+    records = JsonlHistory('published_news.jsonl', retention_days=None).load().records
+    for record in records:
+        norm = NormalizedTitle(record['title'])
+        assert norm.lower == record['title'].lower()
+        assert norm.tokens == tokenize_title(record['title'])
+        assert norm.fingerprint == title_fingerprint(record['title'])
+        assert bool(norm.figures) == bool(MONEY_PATTERN.search(record['title']))
+    
+    item = {'title': "Bitcoin ETF sees $500M inflows", 'norm': NormalizedTitle("Old title")}
+    assert normalized_title(item).tokens == tokenize_title(item['title'])
+    
+    plain = [{'title': record['title'], 'score': i % 7, 'source': 'coindesk'} for i, record in enumerate(records)]
+    with_norm = [dict(item, norm=NormalizedTitle(item['title'])) for item in plain]
+    sort_key = lambda item: -item['score']
+    assert ([[item['title'] for item in cluster] for cluster in cluster_news(plain, 0.3, sort_key)] ==
+            [[item['title'] for item in cluster] for cluster in cluster_news(with_norm, 0.3, sort_key)])
+    
+    index = DuplicateIndex(records[:30])
+    for item in with_norm:
+        assert index.is_duplicate(item) == index.is_duplicate({'title': item['title']})
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        history = JsonlHistory(os.path.join(tmp, 'published.jsonl')).load()
+        norm = with_norm[0]['norm']
+        history.add(with_norm[0]['title'], 'https://example.com/a', fingerprint=norm.fingerprint)
+        history.save()
+        with open(history.path, encoding='utf-8') as f:
+            assert 'norm' not in f.read()
+    
+    print(f"✓ {len(records)} titles normalized once, same tokens and fingerprints")
+
+
+def test_fetch_deadline_feed_cache():
+    """Источник, не успевший к FETCH_TOTAL_TIMEOUT, не попадает в feed_cache"""
+    print("\n\n⏱  Testing fetch deadline and feed cache...\n")
+    
+    import time
+    import news_parser
+    import news_stream
+    
+    body = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>'
+            b'<item><title>Headline</title><link>https://example.com/1</link></item></channel></rss>')
+    
+    def download_feed(url, deadline=None, validators=None):
+        if 'slow' in url:
+            time.sleep(0.6)
+        return body, {'ETag': '"v1"'}
+    
+    sources = {
+        name: {'url': f"https://example.com/{name}.xml", 'priority': 1, 'weight_multiplier': 1.0}
+        for name in ('fast', 'slow')
+    }
+    
+    saved = news_parser.download_feed, news_parser.FETCH_TOTAL_TIMEOUT, news_stream.FETCH_TOTAL_TIMEOUT
+    news_parser.download_feed = download_feed
+    news_parser.FETCH_TOTAL_TIMEOUT = news_stream.FETCH_TOTAL_TIMEOUT = 0.3
+    try:
+        feed_cache = {}
+        news = news_parser.fetch_all_news(sources, feed_cache=feed_cache)
+        assert [item['source'] for item in news] == ['fast']
+        
+        stream_cache = {}
+        records = list(news_stream.stream_news(sources, feed_cache=stream_cache))
+        assert [record['source'] for record in records] == ['fast']
+        
+        time.sleep(0.8)
+        assert list(feed_cache) == ['fast'] and feed_cache['fast']['etag'] == '"v1"'
+        assert list(stream_cache) == ['fast']
+    finally:
+        news_parser.download_feed, news_parser.FETCH_TOTAL_TIMEOUT, news_stream.FETCH_TOTAL_TIMEOUT = saved
+    
+    print("✓ Timed out source keeps its old validators")
+
+
+def test_http_retries():
+    """Повторы http_request: POST только без соединения, 429 ждет retry_after"""
+    print("\n\n🔁 Testing HTTP retries...\n")
+    
+    import requests
+    from http.client import RemoteDisconnected
+    from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+    import news_parser
+    
+    url = 'https://api.telegram.org/botTOKEN/sendMessage'
+    refused = requests.ConnectionError(MaxRetryError(None, url, NewConnectionError(None, 'refused')))
+    dropped = requests.ConnectionError(ProtocolError('Connection aborted.', RemoteDisconnected('closed')))
+    
+    def response(status, body=b'{}', headers=None):
+        result = requests.Response()
+        result.status_code = status
+        result._content = body
+        result.headers.update(headers or {})
+        return result
+    
+    class FakeSession:
+        def __init__(self, outcomes):
+            self.outcomes = list(outcomes)
+            self.calls = 0
+        
+        def request(self, method, url, timeout=None, **kwargs):
+            self.calls += 1
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+    
+    def run(method, outcomes, **kwargs):
+        news_parser._http_session = session = FakeSession(outcomes)
+        try:
+            return news_parser.http_request(method, url, retries=2, **kwargs), session.calls
+        except Exception as e:
+            return e, session.calls
+    
+    delays = []
+    saved = news_parser._http_session, news_parser._backoff_delay, news_parser.time.sleep
+    news_parser._backoff_delay = lambda attempt: 0.0
+    news_parser.time.sleep = delays.append
+    try:
+        # POST: отказ в соединении повторяем, обрыв после отправки - нет
+        result, calls = run('POST', [refused, requests.ConnectTimeout(), response(200)])
+        assert result.status_code == 200 and calls == 3
+        result, calls = run('POST', [dropped, response(200)])
+        assert result is dropped and calls == 1
+        result, calls = run('POST', [requests.ReadTimeout(), response(200)])
+        assert isinstance(result, requests.ReadTimeout) and calls == 1
+        
+        # GET повторяем при любой ошибке соединения
+        result, calls = run('GET', [dropped, requests.ReadTimeout(), response(200)])
+        assert result.status_code == 200 and calls == 3
+        result, calls = run('GET', [refused, refused, refused])
+        assert result is refused and calls == 3
+        
+        # 429: retry_after от Telegram, затем Retry-After
+        delays.clear()
+        result, calls = run('POST', [response(429, b'{"ok":false,"parameters":{"retry_after":3}}'),
+                                     response(429, headers={'Retry-After': '2'}), response(200)])
+        assert result.status_code == 200 and calls == 3 and delays == [3.0, 2.0]
+        
+        # Слишком долгий retry_after или дедлайн - отдаем 429 без ожидания
+        delays.clear()
+        too_long = news_parser.HTTP_MAX_RETRY_AFTER + 1
+        result, calls = run('POST', [response(429, headers={'Retry-After': str(too_long)})])
+        assert result.status_code == 429 and calls == 1 and not delays
+        result, calls = run('GET', [response(429, headers={'Retry-After': '5'})],
+                            deadline=news_parser.time.monotonic() + 1)
+        assert result.status_code == 429 and calls == 1 and not delays
+    finally:
+        news_parser._http_session, news_parser._backoff_delay, news_parser.time.sleep = saved
+    
+    print("✓ POST retried only before connect, 429 waits for retry_after")
+
+
+def test_digest_order():
+    """Дайджест уходит в порядке score: альбом отправляется перед постом без картинки"""
+    print("\n\n🖼  Testing digest publish order...\n")
+    
+    import news_parser
+    
+    items = [{'title': f"News {i}", 'image': i not in (2, 5)} for i in range(8)]
+    sent = []
+    
+    def send_item(news_item, processed_image):
+        sent.append([news_item['title']])
+        return True
+    
+    def send_album(group):
+        sent.append([news_item['title'] for news_item, _ in group])
+        return True
+    
+    saved = (news_parser.TELEGRAM_BOT_TOKEN, news_parser.TELEGRAM_CHANNEL_ID, news_parser.prepare_telegram_image,
+             news_parser._send_telegram_item, news_parser._send_telegram_media_group)
+    news_parser.TELEGRAM_BOT_TOKEN, news_parser.TELEGRAM_CHANNEL_ID = 'token', '@channel'
+    news_parser.prepare_telegram_image = lambda news_item: 'https://example.com/img.jpg' if news_item['image'] else None
+    news_parser._send_telegram_item = send_item
+    news_parser._send_telegram_media_group = send_album
+    try:
+        results = news_parser.publish_digest_to_telegram(items)
+    finally:
+        (news_parser.TELEGRAM_BOT_TOKEN, news_parser.TELEGRAM_CHANNEL_ID, news_parser.prepare_telegram_image,
+         news_parser._send_telegram_item, news_parser._send_telegram_media_group) = saved
+    
+    assert results == [True] * len(items)
+    assert sent == [['News 0', 'News 1'], ['News 2'], ['News 3', 'News 4'], ['News 5'], ['News 6', 'News 7']]
+    
+    print(f"✓ {len(sent)} posts in score order")
+
+
+def test_adaptive_schedule():
+    """Адаптивный интервал: короче на частых feeds, длиннее на тихих, в пределах min/max_interval"""
+    print("\n\n📅 Testing adaptive poll schedule...\n")
+    
+    import calendar
+    from datetime import datetime, timedelta
+    from news_config import DAEMON_POLL_INTERVAL
+    from news_daemon import AdaptiveSchedule
+    
+    sources = {name: {'min_interval': 120, 'max_interval': 900} for name in ('busy', 'idle')}
+    schedule = AdaptiveSchedule(sources)
+    start = datetime(2026, 10, 1, 12, 0)
+    now = calendar.timegm(start.timetuple())
+    
+    def news(*minutes):
+        return [{'published_date': start + timedelta(minutes=m)} for m in minutes]
+    
+    assert schedule.interval('busy') == max(120, min(900, DAEMON_POLL_INTERVAL))
+    
+    # Первый опрос: частота по разбросу дат, одна запись в 10 минут -> 600 с
+    for name in sources:
+        schedule.observe(name, 'ok', news(-60, -50, -40, -30, -20, -10, 0), now=now)
+        assert abs(schedule.interval(name) - 600) < 1e-6
+    
+    busy, idle = [schedule.interval('busy')], [schedule.interval('idle')]
+    for poll in range(1, 9):
+        poll_time = now + poll * 600
+        fresh = news(*(poll * 10 + m / 2 for m in range(1, 11)))
+        schedule.observe('busy', 'ok', fresh, now=poll_time)
+        schedule.observe('idle', 'not_modified', [], now=poll_time)
+        busy.append(schedule.interval('busy'))
+        idle.append(schedule.interval('idle'))
+    
+    assert all(later <= earlier for earlier, later in zip(busy, busy[1:])) and busy[-1] == 120
+    assert all(later >= earlier for earlier, later in zip(idle, idle[1:])) and idle[-1] == 900
+    assert all(120 <= seconds <= 900 for seconds in busy + idle)
+    
+    # Ошибки опроса частоту не меняют
+    rate = schedule.state['busy']['rate']
+    schedule.observe('busy', 'error', [], now=now + 6000)
+    assert schedule.state['busy']['rate'] == rate
+    
+    print(f"✓ busy {busy[0]:.0f}s -> {busy[-1]:.0f}s, idle {idle[0]:.0f}s -> {idle[-1]:.0f}s")
+
+
+def test_alpha_take_cache():
+    """Кэш Alpha Take: TTL, вытеснение давно не использованных, версия промпта, счетчики"""
+    print("\n\n🧠 Testing Alpha Take cache...\n")
+    
+    import os
+    import tempfile
+    import time
+    import news_parser
+    
+    def item(i):
+        return {'title': f"Bitcoin ETF inflows hit record number {i}", 'summary': f"Summary {i}"}
+    
+    def data(i):
+        return {'alpha_take': f"Take {i}", 'context': None, 'hashtags': []}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alpha_cache.json')
+        cache = news_parser.AlphaTakeCache(path, ttl_hours=1, max_entries=3)
+        
+        assert cache.get(item(0)) is None
+        cache.put(item(0), data(0))
+        assert cache.get(item(0)) == data(0)
+        assert cache.get({'title': item(0)['title'].upper() + '  ', 'summary': 'summary 0'}) == data(0)
+        assert (cache.hits, cache.misses) == (2, 1)
+        
+        # TTL: запись старше часа - промах, и после перезагрузки ее нет
+        entry = cache._entries[cache.make_key(item(0))]
+        entry['created'] -= 3601
+        assert cache.get(item(0)) is None and (cache.hits, cache.misses) == (2, 2)
+        cache.save()
+        assert len(news_parser.AlphaTakeCache(path, ttl_hours=1)._entries) == 0
+        
+        # При переполнении вытесняется давно не использованная запись
+        now = time.time()
+        for i in range(1, 4):
+            cache.put(item(i), data(i))
+            cache._entries[cache.make_key(item(i))]['used'] = now - 100 + i
+        assert cache.get(item(1)) == data(1)
+        cache.put(item(4), data(4))
+        assert len(cache._entries) == 3
+        assert cache.get(item(2)) is None
+        assert [cache.get(item(i)) for i in (1, 3, 4)] == [data(1), data(3), data(4)]
+        
+        # Новая версия промпта - старые ответы не подходят
+        version = news_parser.ALPHA_PROMPT_VERSION
+        news_parser.ALPHA_PROMPT_VERSION = f"{version}-test"
+        try:
+            assert cache.get(item(1)) is None
+        finally:
+            news_parser.ALPHA_PROMPT_VERSION = version
+        assert cache.get(item(1)) == data(1)
+    
+    print(f"✓ TTL, LRU eviction, prompt version and counters ({cache.hits} hits, {cache.misses} misses)")
+
+
+def test_image_crop_cache():
+    """Обрезка watermark: размер, ключ кэша (URL + обрезка + размер), повтор из кэша, мелкие картинки"""
+    print("\n\n🖼  Testing image crop and cache...\n")
+    
+    import io
+    import os
+    import tempfile
+    import news_parser
+    from PIL import Image
+    
+    def jpeg(width, height):
+        output = io.BytesIO()
+        Image.new('RGB', (width, height), 'navy').save(output, format='JPEG')
+        return output.getvalue()
+    
+    images = {'https://example.com/big.jpg': jpeg(800, 600), 'https://example.com/small.jpg': jpeg(200, 50)}
+    downloads = []
+    
+    def download_image(image_url):
+        downloads.append(image_url)
+        return images[image_url]
+    
+    saved = (news_parser.IMAGE_CACHE_DIR, news_parser.IMAGE_MAX_DIMENSION, news_parser.WATERMARK_CROP_PIXELS,
+             news_parser.download_image)
+    with tempfile.TemporaryDirectory() as tmp:
+        news_parser.IMAGE_CACHE_DIR = tmp
+        news_parser.IMAGE_MAX_DIMENSION = 400
+        news_parser.WATERMARK_CROP_PIXELS = {'coindesk': 70}
+        news_parser.download_image = download_image
+        try:
+            url = 'https://example.com/big.jpg'
+            
+            # 800x600 без 70px снизу, затем вписываем в 400px
+            first = news_parser.process_image_for_telegram(url, 'CoinDesk')
+            assert Image.open(first).size == (400, 265)
+            path = news_parser._image_cache_path(url, 70)
+            assert os.path.exists(path)
+            
+            # Повтор - из кэша, без загрузки
+            second = news_parser.process_image_for_telegram(url, 'coindesk')
+            assert second.getvalue() == first.getvalue() and downloads == [url]
+            
+            # Другая обрезка или размер - другой файл
+            assert news_parser._image_cache_path(url, 50) != path
+            news_parser.IMAGE_MAX_DIMENSION = 300
+            assert news_parser._image_cache_path(url, 70) != path
+            assert Image.open(news_parser.process_image_for_telegram(url, 'coindesk')).size == (300, 199)
+            assert len(downloads) == 2
+            
+            # Без обрезки и слишком маленькая картинка - отдаем URL
+            assert news_parser.process_image_for_telegram(url, 'decrypt') == url
+            small = 'https://example.com/small.jpg'
+            assert news_parser.process_image_for_telegram(small, 'coindesk') == small
+            assert len(os.listdir(tmp)) == 2
+        finally:
+            (news_parser.IMAGE_CACHE_DIR, news_parser.IMAGE_MAX_DIMENSION, news_parser.WATERMARK_CROP_PIXELS,
+             news_parser.download_image) = saved
+    
+    print("✓ Cropped, cached per crop size and max dimension, small images keep their URL")
+
+
 def main():
     print("=" * 70)
     print("🧪 CRYPTO NEWS BOT - TEST SUITE")
@@ -117,6 +750,48 @@ def main():
     # Тест 3: Все источники
     test_all_sources()
     
+    # Тест 4: Индекс дубликатов
+    test_duplicate_index()
+    
+    # Тест 5: Отпечатки заголовков
+    test_title_fingerprints()
+    
+    # Тест 6: SQLite история
+    test_sqlite_history()
+    
+    # Тест 7: Быстрый RSS парсер
+    test_fast_rss_parser()
+    
+    # Тест 8: Потоковый отбор top-K
+    test_stream_top_k()
+    
+    # Тест 9: Пакетный скоринг
+    test_score_batch()
+    
+    # Тест 10: Архив новостей
+    test_archive()
+    
+    # Тест 11: Нормализованные заголовки
+    test_normalized_title()
+    
+    # Тест 12: Дедлайн загрузки и feed_cache
+    test_fetch_deadline_feed_cache()
+    
+    # Тест 13: Повторы HTTP запросов
+    test_http_retries()
+    
+    # Тест 14: Порядок публикации дайджеста
+    test_digest_order()
+    
+    # Тест 15: Адаптивный интервал опроса
+    test_adaptive_schedule()
+    
+    # Тест 16: Кэш Alpha Take
+    test_alpha_take_cache()
+    
+    # Тест 17: Обрезка и кэш картинок
+    test_image_crop_cache()
+    
     print("\n" + "=" * 70)
     print("✅ Testing complete!")
     print("=" * 70)